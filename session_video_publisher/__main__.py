@@ -1,9 +1,5 @@
 import argparse
 
-from .generate_playlist import generate_playlist
-from .update_video import update_video
-from .upload_video import upload_video
-
 
 def parse_args(argv):
     parser = argparse.ArgumentParser()
@@ -24,26 +20,95 @@ def parse_args(argv):
         action="store_true",
         help="Update video description in YouTube channel",
     )
+    parser.add_argument(
+        "--shard",
+        action="store_true",
+        help="With --upload, claim sessions through lock files in VIDEO_ROOT so several hosts can upload together",
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="With --upload, wait until YouTube finishes processing the uploaded videos",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running, uploading new videos as they finish landing in VIDEO_ROOT",
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Match sessions to video files and write the upload plan, without uploading",
+    )
+    parser.add_argument(
+        "--plan_file",
+        help="Where --plan writes the plan (default: stdout); with --upload, the plan to execute",
+    )
+    parser.add_argument(
+        "--publish",
+        action="store_true",
+        help="Schedule uploaded videos for publishing and add them to the playlist in session order",
+    )
+    parser.add_argument(
+        "--captions",
+        action="store_true",
+        help="Transcribe uploaded videos locally and upload them as captions",
+    )
     parser.add_argument(
         "-o",
         "--output_dir",
         default="./videos",
         help="Output path of video information",
     )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=["json", "ndjson", "parquet"],
+        default="json",
+        help="Playlist output format: one JSON file per video, or all videos in one NDJSON or Parquet file",
+    )
     return parser.parse_args(argv)
 
 
 def main(argv=None):
     options = parse_args(argv)
 
+    # Each command pulls in its own heavy dependencies (Google API client,
+    # fuzzy matching...), so only import the ones actually asked for.
+    if options.plan:
+        from .plan import write_plan
+
+        write_plan(options.plan_file)
+
     if options.upload:
-        upload_video()
+        from .upload_video import upload_video
+
+        upload_video(options.plan_file, options.shard, options.wait)
+
+    if options.watch:
+        from .daemon import watch_folder
+
+        watch_folder()
 
     if options.update_desc:
+        from .update_video import update_video
+
         update_video()
 
+    if options.publish:
+        from .publish import publish_videos
+
+        publish_videos()
+
+    if options.captions:
+        from .captions import generate_captions
+
+        generate_captions()
+
     if options.playlist:
-        generate_playlist(options.output_dir)
+        from .generate_playlist import generate_playlist
+
+        generate_playlist(options.output_dir, options.format)
 
 
 if __name__ == "__main__":
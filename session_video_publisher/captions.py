@@ -0,0 +1,259 @@
+import concurrent.futures
+import functools
+import hashlib
+import importlib
+import importlib.util
+import os
+import pathlib
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import typing
+
+import googleapiclient.http
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+
+from .common import load_conference_source
+from .config import ConfigCaptions as Config
+from .state import StateStore
+
+# Overridable so a different build (or a stub) can be used.
+FFMPEG = os.environ.get("FFMPEG", "ffmpeg")
+
+# Whisper only knows about the language, not the script.
+WHISPER_LANGUAGES = {"zh-hant": "zh", "zh-hans": "zh"}
+
+Segment = typing.Tuple[float, float, str]
+Recognizer = typing.Callable[[str, str, str], typing.Iterable[Segment]]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_whisper_model(model: str):
+    from faster_whisper import WhisperModel
+
+    # Parallelism comes from the worker processes; one thread each avoids
+    # oversubscribing the CPU.
+    return WhisperModel(
+        model, device="cpu", compute_type="int8", cpu_threads=1
+    )
+
+
+def whisper_recognizer(
+    wav_path: str, language: str, model: str
+) -> typing.List[Segment]:
+    """Transcribe with faster-whisper on CPU, loading the model once."""
+    segments, _ = _load_whisper_model(model).transcribe(
+        wav_path, language=WHISPER_LANGUAGES.get(language, language)
+    )
+    return [(s.start, s.end, s.text.strip()) for s in segments]
+
+
+def load_recognizer(spec: str) -> Recognizer:
+    """Look up a recognizer by "module:function", or the Whisper default."""
+    if not spec:
+        return whisper_recognizer
+    module_name, _, func_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def require_caption_tools(spec: str) -> None:
+    """Stop right away if ffmpeg or the recognizer can't be used.
+
+    Otherwise every worker would fail on its own, after the OAuth prompt.
+    """
+    if shutil.which(FFMPEG) is None:
+        raise SystemExit(
+            f"ffmpeg not found (FFMPEG={FFMPEG!r}), needed to extract audio "
+            f"for captions; install FFmpeg or point FFMPEG at it"
+        )
+    if not spec:
+        # Only look for it; the model is loaded in the workers.
+        if importlib.util.find_spec("faster_whisper") is None:
+            raise SystemExit(
+                "faster-whisper not installed, needed for captions; install "
+                "it or set CAPTION_RECOGNIZER"
+            )
+        return
+    try:
+        load_recognizer(spec)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise SystemExit(f"CAPTION_RECOGNIZER={spec!r} not usable: {e}")
+
+
+def content_hash(path: pathlib.Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(functools.partial(f.read, chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_audio(video_path: pathlib.Path, wav_path: pathlib.Path) -> None:
+    # 16 kHz mono is what speech models are trained on.
+    subprocess.run(
+        [
+            FFMPEG,
+            "-v",
+            "error",
+            "-y",
+            "-i",
+            str(video_path),
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            "16000",
+            str(wav_path),
+        ],
+        check=True,
+    )
+
+
+def _format_timestamp(seconds: float) -> str:
+    millis = round(seconds * 1000)
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def render_srt(segments: typing.Iterable[Segment]) -> str:
+    return "".join(
+        f"{i}\n{_format_timestamp(start)} --> {_format_timestamp(end)}\n"
+        f"{text}\n\n"
+        for i, (start, end, text) in enumerate(segments, 1)
+        if text
+    )
+
+
+def transcribe_video(
+    video_path: pathlib.Path,
+    language: str,
+    cache_dir: pathlib.Path,
+    model: str,
+    recognizer_spec: str,
+) -> typing.Tuple[pathlib.Path, float, float]:
+    """Produce an SRT file for a video, reusing a cached one if possible.
+
+    Runs in a worker process. Captions are cached by the video's content
+    hash, so renaming or moving the file doesn't cost a second transcription,
+    and by language, model and recognizer, so captions from a test
+    recognizer are never mistaken for real ones. Returns the SRT path, the
+    audio length and the seconds spent recognizing (zero for a cache hit).
+    """
+    recognizer_key = re.sub(r"[^\w.-]", "_", recognizer_spec or "whisper")
+    srt_path = cache_dir.joinpath(
+        f"{content_hash(video_path)}.{language}.{model}.{recognizer_key}.srt"
+    )
+    if srt_path.exists():
+        return srt_path, 0.0, 0.0
+
+    recognizer = load_recognizer(recognizer_spec)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        wav_path = pathlib.Path(tmp_dir, "audio.wav")
+        extract_audio(video_path, wav_path)
+        # 16-bit mono at 16 kHz, after a 44-byte header.
+        audio_seconds = (wav_path.stat().st_size - 44) / (16000 * 2)
+
+        started = time.monotonic()
+        segments = list(recognizer(str(wav_path), language, model))
+        elapsed = time.monotonic() - started
+
+    tmp_path = srt_path.with_name(srt_path.name + ".tmp")
+    tmp_path.write_text(render_srt(segments), encoding="utf-8")
+    os.replace(tmp_path, srt_path)
+    return srt_path, audio_seconds, elapsed
+
+
+def upload_caption(youtube, vid: str, language: str, srt_path: pathlib.Path):
+    return (
+        youtube.captions()
+        .insert(
+            part="snippet",
+            body={
+                "snippet": {
+                    "videoId": vid,
+                    "language": language,
+                    "name": "",
+                    "isDraft": False,
+                }
+            },
+            media_body=googleapiclient.http.MediaFileUpload(
+                str(srt_path), mimetype="application/octet-stream"
+            ),
+        )
+        .execute()
+    )
+
+
+def generate_captions():
+    Config.variable_check()
+    require_caption_tools(Config.CAPTION_RECOGNIZER)
+
+    print("Generating captions...")
+
+    # build youtube connection
+    flow = InstalledAppFlow.from_client_secrets_file(
+        Config.OAUTH2_CLIENT_SECRET,
+        scopes=["https://www.googleapis.com/auth/youtube.force-ssl"],
+    )
+    credentials = flow.run_console()
+    youtube = build("youtube", "v3", credentials=credentials)
+
+    sessions = {
+        session.id: session
+        for session in load_conference_source(Config).iter_sessions()
+    }
+    cache_dir = pathlib.Path(Config.CAPTION_CACHE)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    with StateStore(Config.STATE_PATH) as state:
+        todo = []
+        for vid, record in state.iter_videos():
+            session = sessions.get(record.get("session_id"))
+            if session is None or record.get("caption") == session.lang:
+                continue
+            if not record.get("file") or not os.path.exists(record["file"]):
+                print(f"No local file for {vid}, skipping {session.title}")
+                continue
+            todo.append((vid, session, pathlib.Path(record["file"])))
+        print(f"    {len(todo)} videos to caption")
+
+        total_audio = total_elapsed = 0.0
+        with concurrent.futures.ProcessPoolExecutor(
+            Config.CAPTION_WORKERS
+        ) as executor:
+            futures = {
+                executor.submit(
+                    transcribe_video,
+                    path,
+                    session.lang,
+                    cache_dir,
+                    Config.CAPTION_MODEL,
+                    Config.CAPTION_RECOGNIZER,
+                ): (vid, session)
+                for vid, session, path in todo
+            }
+            for future in concurrent.futures.as_completed(futures):
+                vid, session = futures[future]
+                try:
+                    srt_path, audio_seconds, elapsed = future.result()
+                except subprocess.CalledProcessError as e:
+                    # Most likely a broken file; the rest can still go ahead.
+                    print(f"Extracting audio failed for {session.title}: {e}")
+                    continue
+                total_audio += audio_seconds
+                total_elapsed += elapsed
+                print(f"Uploading captions for {session.title}")
+                upload_caption(youtube, vid, session.lang, srt_path)
+                state.update_video(vid, caption=session.lang)
+                state.save()
+
+    if total_elapsed:
+        print(
+            f"Transcribed {total_audio / 3600:.1f}h of audio at "
+            f"{total_audio / total_elapsed:.2f}x realtime per worker"
+        )
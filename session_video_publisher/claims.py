@@ -0,0 +1,142 @@
+import contextlib
+import errno
+import json
+import os
+import pathlib
+import socket
+import threading
+import time
+import typing
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+class ClaimDirectory:
+    """Coordinate several uploaders through lock files on shared storage.
+
+    A host claims a session by exclusively creating `<key>.lock`, and keeps
+    the claim alive by touching it while it works. When the upload finishes
+    the lock is renamed to `<key>.done` so nobody picks the session up again.
+    A lock nobody has touched for `lease_seconds` (or left behind by a dead
+    process on this same host) is considered abandoned and can be taken over,
+    so a crashed host never holds its sessions forever.
+    """
+
+    _root: pathlib.Path
+    _lease_seconds: float
+    _owner: dict
+
+    def __init__(self, root: pathlib.Path, lease_seconds: float = 300):
+        self._root = root
+        self._root.mkdir(parents=True, exist_ok=True)
+        self._lease_seconds = lease_seconds
+        self._owner = {"host": socket.gethostname(), "pid": os.getpid()}
+
+    def _lock_path(self, key: str) -> pathlib.Path:
+        return self._root.joinpath(f"{key}.lock")
+
+    def _done_path(self, key: str) -> pathlib.Path:
+        return self._root.joinpath(f"{key}.done")
+
+    def _is_stale(self, path: pathlib.Path) -> bool:
+        try:
+            age = time.time() - path.stat().st_mtime
+            with open(path, encoding="utf-8") as f:
+                owner = json.load(f)
+        except FileNotFoundError:
+            return False
+        except ValueError:
+            # Owner crashed between creating the file and writing to it.
+            return age > self._lease_seconds
+        if age > self._lease_seconds:
+            return True
+        return owner.get("host") == self._owner["host"] and not _pid_alive(
+            owner.get("pid", 0)
+        )
+
+    def _create(self, key: str) -> bool:
+        try:
+            fd = os.open(
+                self._lock_path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY
+            )
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({**self._owner, "claimed": time.time()}, f)
+        return True
+
+    def _break_stale(self, key: str) -> None:
+        lock_path = self._lock_path(key)
+        if not self._is_stale(lock_path):
+            return
+        # Move the lock aside first; only one contender can win the rename.
+        aside = lock_path.with_name(
+            f"{lock_path.name}.{self._owner['host']}.{self._owner['pid']}"
+        )
+        try:
+            os.rename(lock_path, aside)
+        except FileNotFoundError:
+            return
+        # Someone else may have broken and re-created it in the meantime,
+        # in which case we just moved a live claim; put it back.
+        if not self._is_stale(aside):
+            with contextlib.suppress(FileExistsError):
+                os.link(aside, lock_path)
+        os.unlink(aside)
+
+    def claim(self, key: str) -> bool:
+        if self._done_path(key).exists():
+            return False
+        if not self._create(key):
+            self._break_stale(key)
+            if not self._create(key):
+                return False
+        # The previous holder may have completed right before we created
+        # the lock; completion is a rename, so the done file is there now.
+        if self._done_path(key).exists():
+            self.release(key)
+            return False
+        return True
+
+    def renew(self, key: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(self._lock_path(key))
+
+    def release(self, key: str) -> None:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self._lock_path(key))
+
+    def complete(self, key: str) -> None:
+        os.replace(self._lock_path(key), self._done_path(key))
+
+    @contextlib.contextmanager
+    def holding(self, key: str) -> typing.Iterator[None]:
+        """Keep a claim alive while the block runs.
+
+        The claim is marked done if the block finishes, and released for
+        other hosts to retry if it raises.
+        """
+        stopped = threading.Event()
+
+        def heartbeat():
+            while not stopped.wait(self._lease_seconds / 3):
+                self.renew(key)
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            yield
+        except BaseException:
+            self.release(key)
+            raise
+        else:
+            self.complete(key)
+        finally:
+            stopped.set()
+            thread.join()
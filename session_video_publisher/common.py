@@ -1,34 +1,122 @@
 import datetime
+import functools
+import operator
 import pathlib
 import string
-from typing import Dict, List, Union
+from typing import Callable, Dict, Iterable, List, Optional, Union
 
 import fuzzywuzzy.fuzz
-import pytz
+import requests
 
-from .info import Session
+from .info import Conference, ConferenceInfoSource, Session
+from .probe import get_creation_time, get_duration
+from .render import render_session
+from .scan import VideoFile
+from .validate import check_media
 
+# Characters that only exist in one of the two Chinese scripts, common enough
+# to show up in a talk title or abstract.
+_SIMPLIFIED_ONLY = "们这说来时国个为对发经现过还没与问开关见长门东车书语请让话间样实点热认边钱听写员动电马鸟鱼"
+_TRADITIONAL_ONLY = "們這說來時國個為對發經現過還沒與問開關見長門東車書語請讓話間樣實點熱認邊錢聽寫員動電馬鳥魚"
 
-def guess_language(s: str) -> str:
-    """Guess language of a string.
 
-    The only two possible return values are `zh-hant` and `en`.
+def _build_script_table() -> Dict[int, str]:
+    """Map every character we care about to a one-letter script marker.
 
-    Nothing scientific, just a vaguely educated guess. If more than half of the
-    string is ASCII, probably English; otherwise we assume it's Chinese.
+    Translating a string through this table and counting markers with
+    `str.count` keeps the per-character work in C instead of a Python loop.
+    ASCII letters themselves are all remapped, so unmapped characters can
+    never be mistaken for a marker.
     """
-    if sum(c in string.ascii_letters for c in s) > len(s) / 2:
+    table = {ord(c): "e" for c in string.ascii_letters}
+    for start, end in (
+        (0x3400, 0x4DBF),  # CJK unified ideographs extension A.
+        (0x4E00, 0x9FFF),  # CJK unified ideographs.
+        (0xF900, 0xFAFF),  # CJK compatibility ideographs.
+    ):
+        table.update((cp, "h") for cp in range(start, end + 1))
+    for start, end in (
+        (0x3040, 0x30FF),  # Hiragana and Katakana.
+        (0x31F0, 0x31FF),  # Katakana phonetic extensions.
+        (0xFF66, 0xFF9D),  # Half-width Katakana.
+    ):
+        table.update((cp, "j") for cp in range(start, end + 1))
+    for start, end in (
+        (0x1100, 0x11FF),  # Hangul Jamo.
+        (0x3130, 0x318F),  # Hangul compatibility Jamo.
+        (0xAC00, 0xD7AF),  # Hangul syllables.
+    ):
+        table.update((cp, "k") for cp in range(start, end + 1))
+    table.update((ord(c), "s") for c in _SIMPLIFIED_ONLY)
+    table.update((ord(c), "t") for c in _TRADITIONAL_ONLY)
+    return table
+
+
+_SCRIPT_TABLE = _build_script_table()
+
+# Share of CJK characters that must be Kana (or Hangul) to call a string
+# Japanese (or Korean). Chinese titles borrow the odd "の", but Japanese and
+# Korean text is full of particles and endings written in their own scripts.
+_KANA_HANGUL_SHARE = 0.25
+
+
+def _classify(s: str) -> str:
+    marked = s.translate(_SCRIPT_TABLE)
+    if marked.count("e") > len(s) / 2:
         return "en"
+    kana = marked.count("j")
+    hangul = marked.count("k")
+    simplified = marked.count("s")
+    traditional = marked.count("t")
+    cjk = marked.count("h") + simplified + traditional + kana + hangul
+    if max(kana, hangul) > cjk * _KANA_HANGUL_SHARE:
+        return "ja" if kana >= hangul else "ko"
+    if simplified > traditional:
+        return "zh-hans"
     return "zh-hant"
 
 
+def guess_languages(strings: Iterable[str]) -> List[str]:
+    """Guess languages of many strings at once.
+
+    Possible return values are `en`, `ja`, `ko`, `zh-hans` and `zh-hant`.
+
+    Nothing scientific, just a vaguely educated guess. If more than half of the
+    string is ASCII letters, probably English. Otherwise Kana or Hangul making
+    up a fair share of the CJK characters means Japanese or Korean, and
+    characters only found in Simplified Chinese tip it over from the default,
+    Traditional Chinese.
+    """
+    return [_classify(s) for s in strings]
+
+
+def guess_language(s: str) -> str:
+    """Guess language of a string. See `guess_languages`."""
+    return _classify(s)
+
+
+def load_conference_source(config) -> ConferenceInfoSource:
+    return ConferenceInfoSource(
+        requests.get(config.URL).json(),
+        Conference(
+            config.CONFERENCE_NAME, config.FIRST_DATE, config.TIMEZONE_TAIPEI
+        ),
+    )
+
+
 def build_body(session: Session) -> dict:
-    title = session.render_video_title()
+    """Video resource for a session, as inserted on upload.
+
+    The "status" part is for new uploads only; updates leave it out so they
+    don't reset a video's privacy or publishing schedule.
+    """
+    rendered = render_session(session)
+    title = rendered.title
 
     return {
         "snippet": {
             "title": title,
-            "description": session.render_video_description(),
+            "description": rendered.description,
             "tags": [
                 session.conference.name,
                 "pyconapac2022",
@@ -57,28 +145,156 @@ def format_datetime_for_google(dt: datetime.datetime) -> str:
     three digits of milliseconds, and only accepts "Z" suffix (not +00:00),
     so we need to roll our own formatting instead relying on `isoformat()`.
     """
-    return dt.astimezone(pytz.utc).strftime(r"%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    utc = dt.astimezone(datetime.timezone.utc)
+    return f"{utc:%Y-%m-%dT%H:%M:%S}.{utc.microsecond // 1000:03d}Z"
+
+
+# Minimum score for a title (plus schedule signals) to count as a match.
+MATCH_THRESHOLD = 70
+# Below this title ratio a file is never considered, whatever else agrees:
+# unrelated titles sharing a prefix like "Keynote:" score in the low 60s.
+MIN_TITLE_RATIO = 65
+
+# Bonuses on top of the title ratio, from the recording agreeing with the
+# schedule. Directory hints only rule files out; every file in a matching
+# "R1/day1/" folder shares them, so they don't tell files apart.
+_TIME_BONUS = 15
+_DURATION_BONUS = 5
+# Penalty for a recording far too short or long for its slot, or made at a
+# different time altogether.
+_MISMATCH_PENALTY = -30
+# How far outside its slot a recording must be to count as made at a
+# different time; recorders are often started early or stopped late.
+_TIME_SLACK = datetime.timedelta(minutes=30)
+
+
+@functools.lru_cache(maxsize=None)
+def _title_ratio(title: str, target_string: str) -> float:
+    return fuzzywuzzy.fuzz.ratio(title, target_string)
 
 
 def get_match_ratio(session: Session, target_string: str) -> float:
-    return fuzzywuzzy.fuzz.ratio(session.title, target_string)
+    return _title_ratio(session.title, target_string)
+
+
+def filter_by_hints(
+    session: Session, videos: List[VideoFile]
+) -> List[VideoFile]:
+    """Drop files whose directory hints contradict the session's schedule."""
+    local_date = session.start.astimezone(session.conference.timezone).date()
+    return [
+        video
+        for video in videos
+        if (video.room is None or video.room == session.room.upper())
+        and (video.day is None or video.day == session.day)
+        and (video.date is None or video.date == local_date)
+    ]
 
 
 def choose_video(
-    session: Session, source: List[Union[pathlib.Path, Dict]], strategy: str
-) -> str:
-    """Look through the file list and choose the one that "looks most like it"."""
+    session: Session,
+    source: List[Union[pathlib.Path, VideoFile, Dict]],
+    strategy: str,
+) -> Union[str, pathlib.Path, VideoFile]:
+    """Look through the file list and choose the one that "looks most like it".
+
+    Returns the video ID with the "title" strategy, or the matching item from
+    the list with the "path" strategy.
+    """
     choose_video_strategy = {
         "title": lambda source: max(
-            (get_match_ratio(session, p["title"]), p["vid"]) for p in source
+            ((get_match_ratio(session, p["title"]), p["vid"]) for p in source),
+            key=operator.itemgetter(0),
         ),
         "path": lambda source: max(
-            (get_match_ratio(session, p.stem), p.stem) for p in source
+            ((get_match_ratio(session, p.stem), p) for p in source),
+            key=operator.itemgetter(0),
         ),
     }
     if strategy not in choose_video_strategy:
         raise ValueError("strategy should be 'title' or 'path'")
+    if not source:
+        raise ValueError("no match")
     score, match = choose_video_strategy[strategy](source)
-    if score < 70:
+    if score < MATCH_THRESHOLD:
         raise ValueError("no match")
     return match
+
+
+def _time_bonus(session: Session, probe: Optional[dict]) -> int:
+    recorded = get_creation_time(probe)
+    if recorded is None:
+        return 0
+    duration = get_duration(probe) or 0
+    recorded_end = recorded + datetime.timedelta(seconds=duration)
+    overlap = min(session.end, recorded_end) - max(session.start, recorded)
+    if overlap >= (session.end - session.start) / 2:
+        return _TIME_BONUS
+    if (
+        recorded_end < session.start - _TIME_SLACK
+        or recorded > session.end + _TIME_SLACK
+    ):
+        return _MISMATCH_PENALTY
+    return 0
+
+
+def _duration_bonus(session: Session, probe: Optional[dict]) -> int:
+    duration = get_duration(probe)
+    expected = (session.end - session.start).total_seconds()
+    if duration is None or expected <= 0:
+        return 0
+    # Recordings often start early or run into the break, so be lenient.
+    ratio = duration / expected
+    if 0.5 <= ratio <= 1.5:
+        return _DURATION_BONUS
+    if ratio < 0.25 or ratio > 3:
+        return _MISMATCH_PENALTY
+    return 0
+
+
+def match_videos(
+    sessions: Iterable[Session],
+    videos: List[VideoFile],
+    probe: Callable[[VideoFile], Optional[dict]],
+) -> Dict[str, VideoFile]:
+    """Pair sessions with files by title, room, time and recording length.
+
+    Files whose directory hints contradict a session are dropped before any
+    string scoring, and only pairs whose titles are close enough are probed
+    for their recording time and duration, which `probe` caches per file.
+    Each file goes to at most one session: the best-scoring pairs are taken
+    first, so two "Lightning Talks" never end up sharing a recording. Files
+    that fail validation come after every file that passes, so an unfixed
+    DVD recording in "in/" loses to its dvd540fix output in "out/".
+
+    Returns the matched file for each session ID; sessions without one are
+    left out.
+    """
+    videos = sorted(videos, key=operator.attrgetter("path"))
+    candidates = []
+    for order, session in enumerate(sessions):
+        for video in filter_by_hints(session, videos):
+            ratio = get_match_ratio(session, video.stem)
+            if ratio < MIN_TITLE_RATIO:
+                continue
+            info = probe(video)
+            score = (
+                ratio
+                + _time_bonus(session, info)
+                + _duration_bonus(session, info)
+            )
+            if score >= MATCH_THRESHOLD:
+                invalid = bool(check_media(info, session))
+                candidates.append((invalid, -score, order, session.id, video))
+
+    # Ties fall back to schedule order, then path (the sort is stable), so
+    # sharded hosts all agree on the same pairing.
+    candidates.sort(key=operator.itemgetter(0, 1, 2))
+    matches: Dict[str, VideoFile] = {}
+    taken = set()
+    for _, _, _, session_id, video in candidates:
+        if session_id in matches or video.path in taken:
+            continue
+        matches[session_id] = video
+        taken.add(video.path)
+    return matches
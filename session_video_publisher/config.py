@@ -1,14 +1,56 @@
 import datetime
 import os
+import typing
 
-import pytz
+from .timeutil import get_timezone
+
+
+class _Env:
+    """Read an environment variable when accessed, instead of at import time.
+
+    Config classes are imported by every command, so anything evaluated in
+    their bodies runs (and can crash) even for commands that never use it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        default: typing.Optional[str] = None,
+        convert: typing.Optional[typing.Callable[[str], typing.Any]] = None,
+    ):
+        self._name = name
+        self._default = default
+        self._convert = convert
+
+    def __get__(self, obj, owner) -> typing.Any:
+        value = os.environ.get(self._name, self._default)
+        if value is not None and self._convert is not None:
+            return self._convert(value)
+        return value
+
+
+class _Derived:
+    """Compute a config value from other config values when accessed."""
+
+    def __init__(self, fget: typing.Callable[[type], typing.Any]):
+        self._fget = fget
+
+    def __get__(self, obj, owner) -> typing.Any:
+        return self._fget(owner)
+
+
+def _split_list(value: str) -> typing.Tuple[str, ...]:
+    return tuple(item.strip() for item in value.split(",") if item.strip())
 
 
 class Config:
-    YEAR = os.environ.get("YEAR")
-    MONTH = os.environ.get("MONTH")
-    DAY = os.environ.get("DAY")
-    FIRST_DATE = datetime.date(int(YEAR), int(MONTH), int(DAY))
+    YEAR = _Env("YEAR")
+    MONTH = _Env("MONTH")
+    DAY = _Env("DAY")
+    FIRST_DATE = _Derived(
+        lambda cls: datetime.date(int(cls.YEAR), int(cls.MONTH), int(cls.DAY))
+    )
+    STATE_PATH = _Env("STATE_PATH", ".session-video-state.json")
 
     @classmethod
     def variable_check(cls):
@@ -24,10 +66,10 @@ class Config:
 
 
 class ConfigGenerate(Config):
-    YOUTUBE_API_KEY = os.environ["YOUTUBE_API_KEY"]
-    CHANNEL_ID = os.environ.get("CHANNEL_ID", "")
-    PLAYLIST_TITLE = os.environ.get("PLAYLIST_TITLE", "")
-    PLAYLIST_ID = os.environ.get("PLAYLIST_ID", "")
+    YOUTUBE_API_KEY = _Env("YOUTUBE_API_KEY")
+    CHANNEL_ID = _Env("CHANNEL_ID", "")
+    PLAYLIST_TITLE = _Env("PLAYLIST_TITLE", "")
+    PLAYLIST_ID = _Env("PLAYLIST_ID", "")
     MAX_RESULT_LIMIT = 100
 
     @classmethod
@@ -39,11 +81,23 @@ class ConfigGenerate(Config):
 
 
 class ConfigUpload(Config):
-    OAUTH2_CLIENT_SECRET = os.environ.get("OAUTH2_CLIENT_SECRET")
-    URL = os.environ.get("URL")
-    VIDEO_ROOT = os.environ.get("VIDEO_ROOT")
-    CONFERENCE_NAME = f"PyCon Taiwan {Config.YEAR}"
-    TIMEZONE_TAIPEI = pytz.timezone("Asia/Taipei")
+    OAUTH2_CLIENT_SECRET = _Env("OAUTH2_CLIENT_SECRET")
+    URL = _Env("URL")
+    VIDEO_ROOT = _Env("VIDEO_ROOT")
+    VIDEO_EXTENSIONS = _Env("VIDEO_EXTENSIONS", ".avi,.mp4", _split_list)
+    VIDEO_EXCLUDE = _Env("VIDEO_EXCLUDE", "", _split_list)
+    # Expected upload speed, only used to estimate how long a plan takes.
+    UPLOAD_MBPS = _Env("UPLOAD_MBPS", "20", float)
+    # How long a sharded upload claim survives without a heartbeat.
+    CLAIM_LEASE_SECONDS = _Env("CLAIM_LEASE_SECONDS", "300", float)
+    # Watch mode: how often to rescan without inotify, how long a file must
+    # stay unchanged before it counts as fully written, and how often to
+    # refetch the conference schedule.
+    WATCH_POLL_SECONDS = _Env("WATCH_POLL_SECONDS", "30", float)
+    WATCH_SETTLE_SECONDS = _Env("WATCH_SETTLE_SECONDS", "60", float)
+    WATCH_REFRESH_SECONDS = _Env("WATCH_REFRESH_SECONDS", "900", float)
+    CONFERENCE_NAME = _Derived(lambda cls: f"PyCon Taiwan {cls.YEAR}")
+    TIMEZONE_TAIPEI = _Derived(lambda cls: get_timezone("Asia/Taipei"))
     YOUTUBE_SCOPE = "https://www.googleapis.com/auth/youtube"
     YOUTUBE_UPLOAD_SCOPE = "https://www.googleapis.com/auth/youtube.upload"
 
@@ -62,12 +116,12 @@ class ConfigUpload(Config):
 
 
 class ConfigUpdate(Config):
-    OAUTH2_CLIENT_SECRET = os.environ.get("OAUTH2_CLIENT_SECRET")
-    YOUTUBE_API_KEY = os.environ["YOUTUBE_API_KEY"]
-    URL = os.environ.get("URL")
-    PLAYLIST_ID = os.environ.get("PLAYLIST_ID")
-    CONFERENCE_NAME = f"PyCon Taiwan {Config.YEAR}"
-    TIMEZONE_TAIPEI = pytz.timezone("Asia/Taipei")
+    OAUTH2_CLIENT_SECRET = _Env("OAUTH2_CLIENT_SECRET")
+    YOUTUBE_API_KEY = _Env("YOUTUBE_API_KEY")
+    URL = _Env("URL")
+    PLAYLIST_ID = _Env("PLAYLIST_ID")
+    CONFERENCE_NAME = _Derived(lambda cls: f"PyCon Taiwan {cls.YEAR}")
+    TIMEZONE_TAIPEI = _Derived(lambda cls: get_timezone("Asia/Taipei"))
 
     @classmethod
     def variable_check(cls):
@@ -84,3 +138,52 @@ class ConfigUpdate(Config):
         assert (
             cls.YOUTUBE_API_KEY
         ), "envvar YOUTUBE_API_KEY missing, please specify it in the .env file"
+
+
+class ConfigPublish(Config):
+    OAUTH2_CLIENT_SECRET = _Env("OAUTH2_CLIENT_SECRET")
+    URL = _Env("URL")
+    PLAYLIST_ID = _Env("PLAYLIST_ID")
+    CONFERENCE_NAME = _Derived(lambda cls: f"PyCon Taiwan {cls.YEAR}")
+    TIMEZONE_TAIPEI = _Derived(lambda cls: get_timezone("Asia/Taipei"))
+    # When the first video goes public (ISO 8601), and how far apart the rest
+    # follow, in session order. Defaults to one interval from now.
+    PUBLISH_START = _Env("PUBLISH_START")
+    PUBLISH_INTERVAL_MINUTES = _Env("PUBLISH_INTERVAL_MINUTES", "60", float)
+
+    @classmethod
+    def variable_check(cls):
+        Config.variable_check()
+        assert (
+            cls.OAUTH2_CLIENT_SECRET
+        ), "envvar OAUTH2_CLIENT_SECRET missing, please specify it in the .env file"
+        assert (
+            cls.URL
+        ), "envvar URL missing, please specify it in the .env file"
+        assert (
+            cls.PLAYLIST_ID
+        ), "envvar PLAYLIST_ID missing, please specify it in the .env file"
+
+
+class ConfigCaptions(Config):
+    OAUTH2_CLIENT_SECRET = _Env("OAUTH2_CLIENT_SECRET")
+    URL = _Env("URL")
+    CONFERENCE_NAME = _Derived(lambda cls: f"PyCon Taiwan {cls.YEAR}")
+    TIMEZONE_TAIPEI = _Derived(lambda cls: get_timezone("Asia/Taipei"))
+    # Whisper model size, and optionally "module:function" of another
+    # recognizer taking (wav_path, language, model) for offline testing.
+    CAPTION_MODEL = _Env("CAPTION_MODEL", "small")
+    CAPTION_RECOGNIZER = _Env("CAPTION_RECOGNIZER", "")
+    # Number of recognizer processes; defaults to one per CPU.
+    CAPTION_WORKERS = _Env("CAPTION_WORKERS", None, int)
+    CAPTION_CACHE = _Env("CAPTION_CACHE", ".caption-cache")
+
+    @classmethod
+    def variable_check(cls):
+        Config.variable_check()
+        assert (
+            cls.OAUTH2_CLIENT_SECRET
+        ), "envvar OAUTH2_CLIENT_SECRET missing, please specify it in the .env file"
+        assert (
+            cls.URL
+        ), "envvar URL missing, please specify it in the .env file"
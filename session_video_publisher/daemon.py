@@ -0,0 +1,183 @@
+import os
+import pathlib
+import time
+import typing
+
+import requests
+
+from .common import load_conference_source, match_videos
+from .config import ConfigUpload as Config
+from .info import ConferenceInfoSource
+from .probe import require_ffprobe
+from .scan import BUILTIN_EXCLUDES, VideoFile
+from .state import StateStore
+from .upload_video import (
+    build_upload_client,
+    open_video_index,
+    upload_and_archive,
+    validate_or_quarantine,
+)
+
+
+class FolderWatcher:
+    """Sleep until something changes under a directory, or a timeout passes.
+
+    Uses inotify when the optional `inotify_simple` package is available, and
+    falls back to plain sleeping (i.e. polling) otherwise. Changes the
+    uploader makes itself (the index, done/, quarantine/, ...) are ignored.
+    """
+
+    def __init__(self, root: pathlib.Path):
+        self._root = root
+        try:
+            import inotify_simple
+        except ImportError:
+            self._inotify = None
+            return
+        self._flags = (
+            inotify_simple.flags.CLOSE_WRITE
+            | inotify_simple.flags.MOVED_TO
+            | inotify_simple.flags.CREATE
+        )
+        self._inotify = inotify_simple.INotify()
+        self._add_watches()
+
+    def _add_watches(self) -> None:
+        # inotify isn't recursive, so watch every directory; re-adding an
+        # existing watch is harmless, which picks up new directories too.
+        for directory, subdirs, _ in os.walk(self._root):
+            subdirs[:] = [name for name in subdirs if not _is_ignored(name)]
+            self._inotify.add_watch(directory, self._flags)
+
+    def wait(self, timeout: float) -> None:
+        if self._inotify is None:
+            time.sleep(timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events = self._inotify.read(timeout=int(remaining * 1000))
+            if not events:
+                return
+            if any(not _is_ignored(event.name) for event in events):
+                self._add_watches()
+                return
+
+
+def _is_ignored(name: str) -> bool:
+    # Dotfiles cover the video index and its temporary files.
+    return name.startswith(".") or name in BUILTIN_EXCLUDES
+
+
+def _settled_videos(
+    videos: typing.List[VideoFile],
+    seen: typing.Dict[pathlib.Path, typing.Tuple[int, float, float]],
+    settle_seconds: float,
+) -> typing.List[VideoFile]:
+    """Pick files whose size and mtime haven't changed for a while.
+
+    A recording still being written (or copied in) keeps growing, so only
+    files left alone for `settle_seconds` are considered complete.
+    """
+    now = time.monotonic()
+    settled = []
+    current = {}
+    for video in videos:
+        size, mtime, since = seen.get(video.path, (-1, -1.0, now))
+        if (size, mtime) != (video.size, video.mtime):
+            since = now
+        current[video.path] = (video.size, video.mtime, since)
+        if now - since >= settle_seconds:
+            settled.append(video)
+    seen.clear()
+    seen.update(current)
+    return settled
+
+
+def watch_folder():
+    Config.variable_check()
+    require_ffprobe()
+
+    print("Watching for new videos...")
+
+    # build youtube connection, once for the whole run
+    youtube = build_upload_client()
+
+    VIDEO_ROOT = pathlib.Path(Config.VIDEO_ROOT).resolve()
+    print(f"Watching video files in {VIDEO_ROOT}")
+
+    index = open_video_index(VIDEO_ROOT)
+    state = StateStore(Config.STATE_PATH)
+    watcher = FolderWatcher(VIDEO_ROOT)
+
+    source: typing.Optional[ConferenceInfoSource] = None
+    source_loaded = 0.0
+    seen: typing.Dict[pathlib.Path, typing.Tuple[int, float, float]] = {}
+    # Settled files no session matched; retried only if they change.
+    unmatched: typing.Set[typing.Tuple[pathlib.Path, int, float]] = set()
+
+    while True:
+        if (
+            source is None
+            or time.monotonic() - source_loaded > Config.WATCH_REFRESH_SECONDS
+        ):
+            try:
+                new_source = load_conference_source(Config)
+            except (requests.RequestException, ValueError) as e:
+                # Tried again next round; until then the old schedule does.
+                print(f"Fetching the schedule failed: {e!r}")
+                if source is None:
+                    watcher.wait(Config.WATCH_POLL_SECONDS)
+                    continue
+            else:
+                source = new_source
+                source_loaded = time.monotonic()
+                # New or renamed sessions may match files given up on before.
+                unmatched.clear()
+
+        videos = index.scan()
+        settled = _settled_videos(videos, seen, Config.WATCH_SETTLE_SECONDS)
+        ready = [
+            video
+            for video in settled
+            if (video.path, video.size, video.mtime) not in unmatched
+        ]
+        index.probe_many(ready)
+        index.save()
+
+        pending = [
+            session
+            for session in source.iter_sessions()
+            if state.find_video_by_session(session.id) is None
+        ]
+        matches = match_videos(pending, ready, index.probe)
+        queue = [
+            (session, matches[session.id])
+            for session in pending
+            if session.id in matches
+        ]
+        matched_paths = {video.path for video in matches.values()}
+        unmatched.update(
+            (v.path, v.size, v.mtime)
+            for v in ready
+            if v.path not in matched_paths
+        )
+
+        for session, video in queue:
+            try:
+                if not validate_or_quarantine(session, VIDEO_ROOT, video):
+                    continue
+                upload_and_archive(
+                    youtube, session, VIDEO_ROOT, video.path, state
+                )
+            except Exception as e:  # pylint: disable=broad-except
+                # Keep watching; the file stays put and is retried next round.
+                print(f"    Upload failed, will retry: {e!r}")
+
+        # Come back sooner while something is still settling.
+        timeout = Config.WATCH_POLL_SECONDS
+        if len(settled) < len(videos):
+            timeout = min(timeout, Config.WATCH_SETTLE_SECONDS)
+        watcher.wait(timeout)
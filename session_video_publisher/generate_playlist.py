@@ -6,6 +6,10 @@ from googleapiclient.discovery import build
 from slugify import slugify
 
 from .config import ConfigGenerate as Config
+from .state import StateStore
+
+# Table.from_pylist(), used for the Parquet export, is new in pyarrow 7.
+PYARROW_MIN_VERSION = 7
 
 
 def extract_info(description: str):
@@ -28,7 +32,86 @@ def extract_info(description: str):
     return speaker, recorded_day
 
 
-def generate_playlist(output_dir: str):
+def write_json_files(video_records: dict, output_dir: str):
+    """Write each video as its own JSON file, named after its title."""
+    for key in video_records.keys():
+        file_name = (
+            f"{video_records[key]['data']['title'].lower().strip()}".replace(
+                ":", ""
+            ).replace(" ", "-")
+        )
+        file_name = slugify(file_name)
+        data = video_records[key]["data"]
+
+        with open(
+            os.path.join(output_dir, f"{file_name}.json"), "w"
+        ) as json_file:
+            json.dump(data, json_file, indent=4)
+
+        print(file_name)
+
+
+def write_ndjson(video_records: dict, output_dir: str):
+    """Write all videos as one NDJSON file, plus an index by video ID.
+
+    The index maps each video ID to the byte offset and length of its line,
+    so a reader can seek straight to one video without parsing the rest.
+    """
+    path = os.path.join(output_dir, "videos.ndjson")
+    index = {}
+    offset = 0
+    with open(path, "wb") as ndjson_file:
+        for vid, record in video_records.items():
+            line = json.dumps(
+                {"vid": vid, **record["data"]}, ensure_ascii=False
+            ).encode("utf-8")
+            ndjson_file.write(line + b"\n")
+            index[vid] = [offset, len(line)]
+            offset += len(line) + 1
+
+    with open(os.path.join(output_dir, "videos.ndjson.idx.json"), "w") as f:
+        json.dump(index, f)
+
+    print(f"{len(index)} videos written to {path}")
+
+
+def write_parquet(video_records: dict, output_dir: str):
+    """Write all videos as one Parquet table, sorted by video ID."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        version = 0
+    else:
+        version = int(pyarrow.__version__.split(".")[0])
+    if version < PYARROW_MIN_VERSION:
+        raise SystemExit(
+            f"Parquet export needs pyarrow {PYARROW_MIN_VERSION} or later, "
+            f"please `pip install 'pyarrow>={PYARROW_MIN_VERSION}'`"
+        )
+
+    rows = sorted(
+        (
+            {
+                "vid": vid,
+                "title": record["data"]["title"],
+                "description": record["data"]["description"],
+                "speakers": record["data"]["speakers"],
+                "recorded": record["data"]["recorded"],
+                "thumbnail_url": record["data"]["thumbnail_url"],
+                "url": record["data"]["videos"][0]["url"],
+            }
+            for vid, record in video_records.items()
+        ),
+        key=lambda row: row["vid"],
+    )
+    path = os.path.join(output_dir, "videos.parquet")
+    pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), path)
+
+    print(f"{len(rows)} videos written to {path}")
+
+
+def generate_playlist(output_dir: str, output_format: str = "json"):
     Config.variable_check()
 
     print("Generating playlist information...")
@@ -91,15 +174,14 @@ def generate_playlist(output_dir: str):
             "[Warning] The video number exceeds maximum limit, please set MAX_RESULT_LIMIT to larger value."
         )
 
-    pl_request = youtube.playlistItems().list(
-        part="snippet", playlistId=playlist_id, maxResults=playlist_video_num
-    )
-
-    pl_response = pl_request.execute()
+    with StateStore(Config.STATE_PATH) as state:
+        pl_items = state.list_playlist_items(
+            youtube, playlist_id, playlist_video_num
+        )
 
     video_records = {}
 
-    for video in pl_response["items"]:
+    for video in pl_items:
         vid = video["snippet"]["resourceId"]["videoId"]
         data = {}
 
@@ -121,18 +203,9 @@ def generate_playlist(output_dir: str):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    for key in video_records.keys():
-        file_name = (
-            f"{video_records[key]['data']['title'].lower().strip()}".replace(
-                ":", ""
-            ).replace(" ", "-")
-        )
-        file_name = slugify(file_name)
-        data = video_records[key]["data"]
-
-        with open(
-            os.path.join(output_dir, f"{file_name}.json"), "w"
-        ) as json_file:
-            json.dump(data, json_file, indent=4)
-
-        print(file_name)
+    if output_format == "ndjson":
+        write_ndjson(video_records, output_dir)
+    elif output_format == "parquet":
+        write_parquet(video_records, output_dir)
+    else:
+        write_json_files(video_records, output_dir)
@@ -3,7 +3,7 @@ import datetime
 import functools
 import typing
 
-import dateutil.parser
+from .timeutil import parse_datetime
 
 
 @dataclasses.dataclass()
@@ -41,6 +41,7 @@ def _escape_return_string(f) -> typing.Callable[..., str]:
 @dataclasses.dataclass()
 class Session:
     conference: Conference
+    id: str
     title: str
     description: str
     start: datetime.datetime
@@ -61,19 +62,24 @@ class Session:
         title_limit = VIDEO_TITLE_LIMIT - len(suffix)
         return self.title[:title_limit] + suffix
 
-    def _render_slot(self) -> str:
+    @property
+    def day(self) -> int:
         # Fuzzy-match days. Don't be too strict because of leap seconds.
         d_secs = (self.start.date() - self.conference.day1).total_seconds()
         if d_secs > 47 * 60 * 60:
-            day = 3
-        elif d_secs > 23 * 60 * 60:
-            day = 2
-        else:
-            day = 1
+            return 3
+        if d_secs > 23 * 60 * 60:
+            return 2
+        return 1
+
+    def _render_slot(self) -> str:
+        day = self.day
 
-        # Much simpler than messing with strftime().
-        start = str(self.start.astimezone(self.conference.timezone).time())[:5]
-        end = str(self.end.astimezone(self.conference.timezone).time())[:5]
+        # Much simpler (and faster) than messing with strftime().
+        start_time = self.start.astimezone(self.conference.timezone)
+        end_time = self.end.astimezone(self.conference.timezone)
+        start = f"{start_time.hour:02d}:{start_time.minute:02d}"
+        end = f"{end_time.hour:02d}:{end_time.minute:02d}"
 
         if self.room not in ("R0", "R1", "R2", "R3"):
             return f"Day {day}, {start}–{end}"
@@ -129,10 +135,11 @@ class ConferenceInfoSource:
 
             yield Session(
                 conference=self._conference,
+                id=data["id"],
                 title=title,
                 description=data["en"]["description"],
-                start=dateutil.parser.parse(data["start"]),
-                end=dateutil.parser.parse(data["end"]),
+                start=parse_datetime(data["start"]),
+                end=parse_datetime(data["end"]),
                 slides=data["slide"] or None,
                 speakers=[self._speakers[key] for key in data["speakers"]],
                 room=self._rooms[data["room"]],
@@ -0,0 +1,125 @@
+import datetime
+import json
+import pathlib
+import sys
+import typing
+
+from .common import load_conference_source, match_videos
+from .config import ConfigUpload as Config
+from .probe import require_ffprobe
+from .state import StateStore
+from .upload_video import scan_videos
+from .validate import check_media
+
+# Quota cost of a single videos.insert call.
+UPLOAD_QUOTA_COST = 1600
+
+
+def build_plan() -> dict:
+    """Work out everything an upload run would do, without doing it.
+
+    Every session is matched against the files in `VIDEO_ROOT` up front, so
+    unmatched sessions, broken files and orphaned files show up before any
+    bandwidth is spent. The result can be fed back into `upload_video` to execute it.
+    """
+    video_root = pathlib.Path(Config.VIDEO_ROOT).resolve()
+    index, videos = scan_videos(video_root)
+    index.probe_many(videos)
+    source = load_conference_source(Config)
+    state = StateStore(Config.STATE_PATH)
+
+    bytes_per_second = Config.UPLOAD_MBPS * 1_000_000 / 8
+
+    uploads = []
+    invalid = []
+    unmatched_sessions = []
+    already_uploaded = []
+    matched_paths = set()
+
+    pending = []
+    for session in source.iter_sessions():
+        vid = state.find_video_by_session(session.id)
+        if vid is None:
+            pending.append(session)
+        else:
+            already_uploaded.append(
+                {"session_id": session.id, "title": session.title, "vid": vid}
+            )
+    matches = match_videos(pending, videos, index.probe)
+
+    for session in pending:
+        entry = {"session_id": session.id, "title": session.title}
+
+        video = matches.get(session.id)
+        if video is None:
+            unmatched_sessions.append(entry)
+            continue
+
+        size = video.size
+        matched_paths.add(video.path)
+
+        problems = check_media(video.probe, session)
+        if problems:
+            invalid.append(
+                {
+                    **entry,
+                    "path": video.path.relative_to(video_root).as_posix(),
+                    "problems": problems,
+                }
+            )
+            continue
+
+        uploads.append(
+            {
+                **entry,
+                "path": video.path.relative_to(video_root).as_posix(),
+                "size": size,
+                "quota": UPLOAD_QUOTA_COST,
+                "eta_seconds": round(size / bytes_per_second),
+            }
+        )
+
+    index.save()
+
+    orphaned_files = [
+        video.path.relative_to(video_root).as_posix()
+        for video in videos
+        if video.path not in matched_paths
+    ]
+
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "video_root": str(video_root),
+        "uploads": uploads,
+        "invalid": invalid,
+        "unmatched_sessions": unmatched_sessions,
+        "orphaned_files": orphaned_files,
+        "already_uploaded": already_uploaded,
+        "total_bytes": sum(entry["size"] for entry in uploads),
+        "total_quota": sum(entry["quota"] for entry in uploads),
+        "eta_seconds": sum(entry["eta_seconds"] for entry in uploads),
+    }
+
+
+def write_plan(plan_file: typing.Optional[str]):
+    Config.variable_check()
+    require_ffprobe()
+
+    plan = build_plan()
+    if plan_file:
+        with open(plan_file, "w", encoding="utf-8") as f:
+            json.dump(plan, f, indent=4, ensure_ascii=False)
+    else:
+        json.dump(plan, sys.stdout, indent=4, ensure_ascii=False)
+        print()
+
+    print(
+        f"{len(plan['uploads'])} uploads, "
+        f"{plan['total_bytes'] / (1 << 30):.1f} GiB, "
+        f"{plan['total_quota']} quota units, "
+        f"ETA {datetime.timedelta(seconds=plan['eta_seconds'])}; "
+        f"{len(plan['invalid'])} invalid files, "
+        f"{len(plan['unmatched_sessions'])} unmatched sessions, "
+        f"{len(plan['orphaned_files'])} orphaned files",
+        file=sys.stderr,
+    )
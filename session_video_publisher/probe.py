@@ -0,0 +1,83 @@
+import datetime
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import typing
+
+from .timeutil import parse_datetime
+
+# Overridable so a different build (or a stub) can be used.
+FFPROBE = os.environ.get("FFPROBE", "ffprobe")
+
+
+class ProbeError(Exception):
+    pass
+
+
+def require_ffprobe() -> None:
+    """Stop right away if ffprobe can't be run.
+
+    Without it no file could be validated, and every broken recording would
+    be uploaded as if it were fine.
+    """
+    if shutil.which(FFPROBE) is None:
+        raise SystemExit(
+            f"ffprobe not found (FFPROBE={FFPROBE!r}), needed to check videos "
+            f"before uploading; install FFmpeg or point FFPROBE at it"
+        )
+
+
+def probe_media(path: pathlib.Path) -> dict:
+    """Run ffprobe on a file and return its container and stream info.
+
+    Raises `ProbeError` if ffprobe cannot read the file, and lets
+    `FileNotFoundError` through if ffprobe itself is not installed (see
+    `require_ffprobe`).
+    """
+    result = subprocess.run(
+        [
+            FFPROBE,
+            "-v",
+            "error",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            str(path),
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise ProbeError(result.stderr.decode("utf-8", "replace").strip())
+    try:
+        return json.loads(result.stdout)
+    except ValueError as e:
+        raise ProbeError(f"unreadable ffprobe output: {e}") from e
+
+
+def get_duration(probe: typing.Optional[dict]) -> typing.Optional[float]:
+    if not probe:
+        return None
+    try:
+        return float(probe["format"]["duration"])
+    except (KeyError, ValueError):
+        return None
+
+
+def get_creation_time(
+    probe: typing.Optional[dict],
+) -> typing.Optional[datetime.datetime]:
+    """When the recording started, if the recorder wrote it down."""
+    if not probe:
+        return None
+    try:
+        created = parse_datetime(probe["format"]["tags"]["creation_time"])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    if created.tzinfo is None:
+        return None
+    return created
@@ -0,0 +1,131 @@
+import time
+import typing
+
+from .state import StateStore
+
+# videos.list accepts at most this many IDs per call.
+MAX_IDS_PER_REQUEST = 50
+
+MIN_POLL_INTERVAL = 30
+MAX_POLL_INTERVAL = 600
+
+# A fresh upload can take a while to show up in videos.list; only a video
+# missing for longer than this is given up on.
+MISSING_GRACE_SECONDS = 900
+
+# Final statuses of videos that never became watchable.
+FAILED_STATUSES = ("failed", "rejected", "terminated")
+
+
+def _chunks(items: typing.List[str], size: int) -> typing.Iterator[list]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _processing_status(item: dict) -> str:
+    """Boil YouTube's status fields down to one word.
+
+    "processing" while YouTube is still working on it, and otherwise the
+    final `processingStatus`: "succeeded", "failed", "rejected" or
+    "terminated". An upload YouTube gave up on (e.g. a duplicate) is reported
+    as "rejected" regardless of what processingDetails says.
+    """
+    upload_status = item["status"].get("uploadStatus")
+    if upload_status in ("failed", "rejected", "deleted"):
+        return "rejected"
+    status = item.get("processingDetails", {}).get("processingStatus")
+    return status or "processing"
+
+
+def poll_processing(youtube, video_ids: typing.Iterable[str]) -> dict:
+    """Ask YouTube for the processing status of many videos, 50 per call.
+
+    Videos YouTube doesn't return (not listed yet, or deleted) are left out.
+    """
+    statuses = {}
+    for chunk in _chunks(list(video_ids), MAX_IDS_PER_REQUEST):
+        response = (
+            youtube.videos()
+            .list(
+                part="processingDetails,status",
+                id=",".join(chunk),
+                maxResults=MAX_IDS_PER_REQUEST,
+            )
+            .execute()
+        )
+        for item in response["items"]:
+            statuses[item["id"]] = _processing_status(item)
+    return statuses
+
+
+def wait_for_processing(
+    youtube,
+    video_ids: typing.Iterable[str],
+    state: typing.Optional[StateStore] = None,
+    on_done: typing.Optional[typing.Callable[[str, str], None]] = None,
+    timeout: typing.Optional[float] = None,
+) -> dict:
+    """Poll until every video has finished processing, or `timeout` passes.
+
+    The interval starts short and doubles every round nothing changes, up to
+    ten minutes, dropping back as soon as some video finishes. `on_done` is
+    called with the ID and final status of each video as it finishes, and
+    the status is recorded in `state` when given. A video YouTube stops
+    returning altogether ends up "missing" after `MISSING_GRACE_SECONDS`.
+    """
+    pending = set(video_ids)
+    statuses: typing.Dict[str, str] = {}
+    missing_since: typing.Dict[str, float] = {}
+    interval = MIN_POLL_INTERVAL
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    while pending:
+        polled = poll_processing(youtube, sorted(pending))
+        now = time.monotonic()
+        for vid in pending:
+            if vid in polled:
+                missing_since.pop(vid, None)
+            elif (
+                now - missing_since.setdefault(vid, now)
+                >= MISSING_GRACE_SECONDS
+            ):
+                polled[vid] = "missing"
+        finished = {
+            vid: status
+            for vid, status in polled.items()
+            if status != "processing"
+        }
+        for vid, status in finished.items():
+            print(f"    {vid}: {status}")
+            statuses[vid] = status
+            pending.discard(vid)
+            if state is not None:
+                with state:
+                    state.update_video(vid, status=status)
+            if on_done is not None:
+                on_done(vid, status)
+
+        if not pending:
+            break
+
+        if finished:
+            interval = MIN_POLL_INTERVAL
+        else:
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+        if deadline is not None and time.monotonic() + interval > deadline:
+            break
+        print(
+            f"{len(pending)} videos still processing, "
+            f"next check in {interval}s"
+        )
+        time.sleep(interval)
+
+    statuses.update((vid, "processing") for vid in pending)
+    return statuses
+
+
+def summarize(statuses: dict) -> str:
+    counts: typing.Dict[str, int] = {}
+    for status in statuses.values():
+        counts[status] = counts.get(status, 0) + 1
+    return ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
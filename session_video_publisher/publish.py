@@ -0,0 +1,158 @@
+import datetime
+import typing
+
+from google_auth_oauthlib.flow import InstalledAppFlow
+from googleapiclient.discovery import build
+
+from .common import format_datetime_for_google, load_conference_source
+from .config import ConfigPublish as Config
+from .info import Session
+from .processing import FAILED_STATUSES, MAX_IDS_PER_REQUEST
+from .state import StateStore
+from .timeutil import parse_datetime
+
+# Upper bound on the playlist size we look at when checking what's in it.
+MAX_PLAYLIST_ITEMS = 1000
+
+
+def _published_sessions(
+    sessions: typing.Iterable[Session], state: StateStore
+) -> typing.List[typing.Tuple[Session, str]]:
+    """Pair sessions with their uploaded videos, in schedule order."""
+    pairs = []
+    for session in sessions:
+        vid = state.find_video_by_session(session.id)
+        if vid is None:
+            continue
+        record = state.get_video(vid) or {}
+        if record.get("status") in FAILED_STATUSES:
+            print(f"Processing failed, not publishing {session.title}")
+            continue
+        pairs.append((session, vid))
+    pairs.sort(key=lambda pair: (pair[0].start, pair[0].room))
+    return pairs
+
+
+def _fetch_statuses(youtube, vids: typing.List[str]) -> typing.Dict[str, dict]:
+    statuses = {}
+    for i in range(0, len(vids), MAX_IDS_PER_REQUEST):
+        response = (
+            youtube.videos()
+            .list(
+                part="status",
+                id=",".join(vids[i : i + MAX_IDS_PER_REQUEST]),
+                maxResults=MAX_IDS_PER_REQUEST,
+            )
+            .execute()
+        )
+        for item in response["items"]:
+            statuses[item["id"]] = item["status"]
+    return statuses
+
+
+def schedule_publishing(youtube, pairs, statuses) -> None:
+    interval = datetime.timedelta(minutes=Config.PUBLISH_INTERVAL_MINUTES)
+    if Config.PUBLISH_START:
+        first = parse_datetime(Config.PUBLISH_START)
+    else:
+        # "Now" would already be in the past by the time YouTube sees it.
+        first = datetime.datetime.now(datetime.timezone.utc) + interval
+
+    # Every session keeps the slot of its place in the schedule, whether or
+    # not the videos before it are public (or gone) by now.
+    for position, (session, vid) in enumerate(pairs):
+        target = format_datetime_for_google(first + interval * position)
+
+        status = statuses.get(vid)
+        if status is None:
+            print(f"Video {vid} gone, skipping {session.title}")
+            continue
+        if status["privacyStatus"] == "public":
+            continue
+
+        # Leave existing schedules alone unless a start time is given, so a
+        # rerun without PUBLISH_START doesn't keep pushing them back.
+        scheduled = status.get("publishAt")
+        if scheduled and (
+            not Config.PUBLISH_START
+            or format_datetime_for_google(parse_datetime(scheduled)) == target
+        ):
+            continue
+
+        # Scheduled publishing only works on private videos.
+        new_status = {
+            "license": status.get("license", "creativeCommon"),
+            "privacyStatus": "private",
+            "publishAt": target,
+        }
+
+        print(f"Publishing {session.title} at {new_status['publishAt']}")
+        youtube.videos().update(
+            part="status", body={"id": vid, "status": new_status}
+        ).execute()
+
+
+def insert_into_playlist(youtube, pairs, state: StateStore) -> None:
+    items = state.list_playlist_items(
+        youtube, Config.PLAYLIST_ID, MAX_PLAYLIST_ITEMS
+    )
+    positions = {
+        item["snippet"]["resourceId"]["videoId"]: item["snippet"]["position"]
+        for item in items
+    }
+    end = len(items)
+
+    # Slot each missing video in right after the previous session's video,
+    # wherever that sits; videos before any of ours go in front of the first
+    # one already there, or at the end. Other videos are left where they are.
+    previous: typing.Optional[int] = None
+    for i, (session, vid) in enumerate(pairs):
+        if vid in positions:
+            previous = positions[vid]
+            continue
+        if previous is not None:
+            position = previous + 1
+        else:
+            position = next(
+                (positions[v] for _, v in pairs[i:] if v in positions), end
+            )
+        print(f"Adding {session.title} to playlist at #{position}")
+        youtube.playlistItems().insert(
+            part="snippet",
+            body={
+                "snippet": {
+                    "playlistId": Config.PLAYLIST_ID,
+                    "position": position,
+                    "resourceId": {"kind": "youtube#video", "videoId": vid},
+                }
+            },
+        ).execute()
+        for other, other_position in positions.items():
+            if other_position >= position:
+                positions[other] = other_position + 1
+        positions[vid] = previous = position
+        end += 1
+
+
+def publish_videos():
+    Config.variable_check()
+
+    print("Publishing videos...")
+
+    # build youtube connection
+    flow = InstalledAppFlow.from_client_secrets_file(
+        Config.OAUTH2_CLIENT_SECRET,
+        scopes=["https://www.googleapis.com/auth/youtube"],
+    )
+    credentials = flow.run_console()
+    youtube = build("youtube", "v3", credentials=credentials)
+
+    source = load_conference_source(Config)
+
+    with StateStore(Config.STATE_PATH) as state:
+        pairs = _published_sessions(source.iter_sessions(), state)
+        print(f"    {len(pairs)} uploaded sessions found")
+
+        statuses = _fetch_statuses(youtube, [vid for _, vid in pairs])
+        schedule_publishing(youtube, pairs, statuses)
+        insert_into_playlist(youtube, pairs, state)
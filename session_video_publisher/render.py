@@ -0,0 +1,28 @@
+import typing
+
+from .info import Session
+
+
+class RenderedSession(typing.NamedTuple):
+    session: Session
+    title: str
+    description: str
+
+
+def render_session(session: Session) -> RenderedSession:
+    return RenderedSession(
+        session,
+        session.render_video_title(),
+        session.render_video_description(),
+    )
+
+
+def render_all(
+    sessions: typing.Iterable[Session],
+) -> typing.List[RenderedSession]:
+    """Render every session up front.
+
+    Each session is rendered once per run, so there is nothing worth caching
+    here; see tests/test_render.py for the benchmark.
+    """
+    return [render_session(session) for session in sessions]
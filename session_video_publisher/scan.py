@@ -0,0 +1,221 @@
+import concurrent.futures
+import contextlib
+import dataclasses
+import datetime
+import fnmatch
+import json
+import os
+import pathlib
+import re
+import socket
+import typing
+
+from .probe import ProbeError, probe_media
+
+# Directories the uploader itself writes into VIDEO_ROOT.
+BUILTIN_EXCLUDES = ("done", "claims", "quarantine")
+
+INDEX_FILE_NAME = ".video-index.json"
+
+_ROOM_PATTERN = re.compile(r"(?<![a-z0-9])(r\d+)(?![a-z0-9])", re.IGNORECASE)
+_DAY_PATTERN = re.compile(r"(?<![a-z])day[ _-]?(\d+)", re.IGNORECASE)
+_DATE_PATTERN = re.compile(r"(\d{4})-?(\d{2})-?(\d{2})")
+
+
+@dataclasses.dataclass()
+class VideoFile:
+    path: pathlib.Path
+    size: int
+    mtime: float
+    # Hints taken from the directory names, e.g. "R0/day2/" or "2022-09-04".
+    room: typing.Optional[str] = None
+    day: typing.Optional[int] = None
+    date: typing.Optional[datetime.date] = None
+    # Cached ffprobe output, filled in lazily by the matcher.
+    probe: typing.Optional[dict] = None
+
+    @property
+    def stem(self) -> str:
+        return self.path.stem
+
+
+def _parse_hints(parts: typing.Sequence[str]) -> dict:
+    hints: typing.Dict[str, typing.Any] = {}
+    for part in parts:
+        m = _ROOM_PATTERN.search(part)
+        if m:
+            hints["room"] = m.group(1).upper()
+        m = _DAY_PATTERN.search(part)
+        if m:
+            hints["day"] = int(m.group(1))
+        m = _DATE_PATTERN.search(part)
+        if m:
+            try:
+                hints["date"] = datetime.date(*map(int, m.groups()))
+            except ValueError:
+                pass
+    return hints
+
+
+class VideoIndex:
+    """Walk VIDEO_ROOT for video files, remembering what we found last time.
+
+    The index is stored next to the videos, keyed by path relative to the
+    root. A file whose size and mtime are unchanged keeps its cached probe
+    data, so a rescan only ever stats files.
+    """
+
+    _root: pathlib.Path
+    _extensions: typing.Tuple[str, ...]
+    _excludes: typing.Tuple[str, ...]
+    _index_path: pathlib.Path
+    _entries: typing.Dict[str, dict]
+    _dirty: bool
+
+    def __init__(
+        self,
+        root: pathlib.Path,
+        extensions: typing.Iterable[str] = (".avi", ".mp4"),
+        excludes: typing.Iterable[str] = (),
+    ):
+        self._root = root
+        self._extensions = tuple(ext.lower() for ext in extensions)
+        self._excludes = BUILTIN_EXCLUDES + tuple(excludes)
+        self._index_path = root.joinpath(INDEX_FILE_NAME)
+        try:
+            with open(self._index_path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._entries = {}
+        self._dirty = False
+
+    def _is_excluded(self, name: str, rel_path: str) -> bool:
+        if name.startswith("."):
+            return True
+        return any(
+            fnmatch.fnmatch(name, pattern)
+            or fnmatch.fnmatch(rel_path, pattern)
+            for pattern in self._excludes
+        )
+
+    def _walk(
+        self, directory: str, parts: typing.Tuple[str, ...]
+    ) -> typing.Iterator[typing.Tuple[os.DirEntry, typing.Tuple[str, ...]]]:
+        try:
+            it = os.scandir(directory)
+        except FileNotFoundError:
+            # Removed since its parent was listed.
+            return
+        with it:
+            for entry in it:
+                rel_path = "/".join(parts + (entry.name,))
+                if self._is_excluded(entry.name, rel_path):
+                    continue
+                if entry.is_dir():
+                    yield from self._walk(entry.path, parts + (entry.name,))
+                elif entry.is_file() and entry.name.lower().endswith(
+                    self._extensions
+                ):
+                    yield entry, parts
+
+    def scan(self) -> typing.List[VideoFile]:
+        entries = {}
+        videos = []
+        for entry, parts in self._walk(str(self._root), ()):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                # Moved or deleted while we were scanning.
+                continue
+            rel_path = "/".join(parts + (entry.name,))
+
+            cached = self._entries.get(rel_path)
+            if (
+                cached
+                and cached["size"] == stat.st_size
+                and cached["mtime"] == stat.st_mtime
+            ):
+                probe = cached.get("probe")
+            else:
+                probe = None
+            entries[rel_path] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "probe": probe,
+            }
+
+            videos.append(
+                VideoFile(
+                    path=pathlib.Path(entry.path),
+                    size=stat.st_size,
+                    mtime=stat.st_mtime,
+                    probe=probe,
+                    **_parse_hints(parts),
+                )
+            )
+        if entries != self._entries:
+            self._entries = entries
+            self._dirty = True
+        return videos
+
+    def probe(self, video: VideoFile) -> typing.Optional[dict]:
+        """Probe a file with ffprobe, at most once per size and mtime.
+
+        Files ffprobe cannot read are recorded with an "error" key.
+        """
+        if video.probe is None:
+            try:
+                probe = probe_media(video.path)
+            except ProbeError as e:
+                probe = {"error": str(e)}
+            self.update_probe(video, probe)
+        return video.probe
+
+    def probe_many(
+        self,
+        videos: typing.Iterable[VideoFile],
+        max_workers: typing.Optional[int] = None,
+    ) -> None:
+        """Probe every file not probed yet, running ffprobe in parallel."""
+        pending = [video for video in videos if video.probe is None]
+        if not pending:
+            return
+        # ffprobe does the work in a subprocess, so threads are enough.
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = {
+                executor.submit(probe_media, video.path): video
+                for video in pending
+            }
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    probe = future.result()
+                except ProbeError as e:
+                    probe = {"error": str(e)}
+                self.update_probe(futures[future], probe)
+
+    def update_probe(self, video: VideoFile, probe: dict) -> None:
+        video.probe = probe
+        rel_path = video.path.relative_to(self._root).as_posix()
+        if rel_path in self._entries:
+            self._entries[rel_path]["probe"] = probe
+            self._dirty = True
+
+    def save(self) -> None:
+        # Skip unchanged saves: the file sits in the watched VIDEO_ROOT, and
+        # rewriting it would wake the watcher straight back up.
+        if not self._dirty:
+            return
+        # VIDEO_ROOT may be shared by several uploaders (see --shard), so each
+        # writer needs its own temporary file; the last rename wins.
+        tmp_path = self._index_path.with_name(
+            f"{self._index_path.name}.{socket.gethostname()}.{os.getpid()}.tmp"
+        )
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self._index_path)
+            self._dirty = False
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
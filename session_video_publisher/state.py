@@ -0,0 +1,148 @@
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import socket
+import typing
+
+# playlistItems.list returns at most this many items per page.
+PLAYLIST_PAGE_SIZE = 50
+
+
+def body_digest(body: dict) -> str:
+    """Fingerprint of a video body, to tell whether YouTube needs an update."""
+    dumped = json.dumps(body, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(dumped.encode("utf-8")).hexdigest()
+
+
+class StateStore:
+    """Local JSON mirror of what we know about the channel.
+
+    Videos are keyed by YouTube video ID, and carry the session ID they were
+    uploaded for, the last-known metadata, the etag YouTube gave us, and an
+    upload status. Playlist listings are cached page by page together with
+    their etags, so later runs can ask YouTube "has anything changed?" instead
+    of pulling the whole playlist again.
+    """
+
+    _path: pathlib.Path
+    _data: dict
+
+    def __init__(self, path: typing.Union[str, os.PathLike]):
+        self._path = pathlib.Path(path)
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        except FileNotFoundError:
+            self._data = {}
+        self._data.setdefault("videos", {})
+        self._data.setdefault("playlists", {})
+
+    def __enter__(self) -> "StateStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.save()
+
+    def save(self) -> None:
+        # Write-then-rename so an interrupted run never leaves half a file,
+        # through a temporary file of our own in case other processes share
+        # the state file.
+        tmp_path = self._path.with_name(
+            f"{self._path.name}.{socket.gethostname()}.{os.getpid()}.tmp"
+        )
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self._path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+
+    def get_video(self, vid: str) -> typing.Optional[dict]:
+        return self._data["videos"].get(vid)
+
+    def iter_videos(self) -> typing.Iterator[typing.Tuple[str, dict]]:
+        yield from self._data["videos"].items()
+
+    def update_video(self, vid: str, **fields) -> dict:
+        record = self._data["videos"].setdefault(vid, {})
+        record.update(fields)
+        return record
+
+    def find_video_by_session(self, session_id: str) -> typing.Optional[str]:
+        for vid, record in self._data["videos"].items():
+            if record.get("session_id") == session_id:
+                return vid
+        return None
+
+    def list_playlist_items(
+        self, youtube, playlist_id: str, max_results: int
+    ) -> typing.List[dict]:
+        """List items in a playlist, reusing cached pages that are unchanged.
+
+        Each page request carries the etag that page had on the previous run,
+        and YouTube answers 304 if it is untouched, in which case the cached
+        page is used. A page's etag only covers the items on it, so every page
+        is checked, up to `max_results` items.
+        """
+        from googleapiclient.errors import HttpError
+
+        cached_pages = self._data["playlists"].get(playlist_id, {})
+        cached_pages = cached_pages.get("pages", [])
+
+        pages: typing.List[dict] = []
+        items: typing.List[dict] = []
+        page_token = None
+        while len(items) < max_results:
+            cached = None
+            if len(pages) < len(cached_pages):
+                cached = cached_pages[len(pages)]
+                # Only comparable if it starts where this request does.
+                if cached["token"] != page_token:
+                    cached = None
+
+            kwargs = {}
+            if page_token is not None:
+                kwargs["pageToken"] = page_token
+            request = youtube.playlistItems().list(
+                part="snippet",
+                playlistId=playlist_id,
+                maxResults=min(max_results - len(items), PLAYLIST_PAGE_SIZE),
+                **kwargs,
+            )
+            if cached:
+                request.headers["If-None-Match"] = cached["etag"]
+
+            try:
+                response = request.execute()
+            except HttpError as e:
+                if not (cached and e.resp.status == 304):
+                    raise
+                page = cached
+            else:
+                page = {
+                    "token": page_token,
+                    "etag": response["etag"],
+                    "items": response["items"],
+                    "next": response.get("nextPageToken"),
+                }
+            pages.append(page)
+            items.extend(page["items"])
+
+            page_token = page["next"]
+            if page_token is None:
+                break
+
+        self._data["playlists"][playlist_id] = {"pages": pages}
+        for item in items:
+            snippet = item["snippet"]
+            self.update_video(
+                snippet["resourceId"]["videoId"],
+                title=snippet["title"],
+                description=snippet["description"],
+                etag=item["etag"],
+            )
+        return items
@@ -0,0 +1,44 @@
+import datetime
+import functools
+
+try:
+    import zoneinfo
+except ImportError:  # Python < 3.9.
+    zoneinfo = None  # type: ignore
+
+
+@functools.lru_cache(maxsize=None)
+def get_timezone(name: str) -> datetime.tzinfo:
+    """Look up a timezone by its IANA name, once per name.
+
+    Prefer the standard library's `zoneinfo`, and fall back to pytz on Python
+    versions without it, or systems without a tz database.
+    """
+    if zoneinfo is not None:
+        try:
+            return zoneinfo.ZoneInfo(name)
+        except zoneinfo.ZoneInfoNotFoundError:
+            pass
+
+    import pytz
+
+    return pytz.timezone(name)
+
+
+def parse_datetime(s: str) -> datetime.datetime:
+    """Parse a timestamp from the conference API.
+
+    The API gives ISO 8601, which `fromisoformat()` handles much faster than
+    dateutil. Older Pythons don't understand the "Z" suffix, so spell it out;
+    anything else unexpected is still left to dateutil.
+    """
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    try:
+        return datetime.datetime.fromisoformat(s)
+    except ValueError:
+        pass
+
+    import dateutil.parser
+
+    return dateutil.parser.parse(s)
@@ -1,10 +1,9 @@
-import requests
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
-from .common import build_body, choose_video
+from .common import build_body, choose_video, load_conference_source
 from .config import ConfigUpdate as Config
-from .info import Conference, ConferenceInfoSource
+from .state import StateStore, body_digest
 
 
 def update_video():
@@ -40,15 +39,14 @@ def update_video():
     playlist_id = playlist["id"]
     playlist_video_num = int(playlist["contentDetails"]["itemCount"])
 
-    pl_request = youtube.playlistItems().list(
-        part="snippet", playlistId=playlist_id, maxResults=playlist_video_num
+    state = StateStore(Config.STATE_PATH)
+    pl_items = state.list_playlist_items(
+        youtube, playlist_id, playlist_video_num
     )
 
-    pl_response = pl_request.execute()
-
     video_records = []
 
-    for video in pl_response["items"]:
+    for video in pl_items:
         data = {}
         vid = video["snippet"]["resourceId"]["videoId"]
         data["vid"] = vid
@@ -64,24 +62,38 @@ def update_video():
 
         video_records.append(data)
 
-    source = ConferenceInfoSource(
-        requests.get(Config.URL).json(),
-        Conference(
-            Config.CONFERENCE_NAME, Config.FIRST_DATE, Config.TIMEZONE_TAIPEI
-        ),
-    )
-
-    for session in source.iter_sessions():
-        body = build_body(session)
-        try:
-            vid = choose_video(session, video_records, "title")
-        except ValueError:
-            print(f"No match, ignoring {session.title}")
-            continue
-        print(f'Updating "{vid}" with "{body}"')
-
-        request = youtube.videos().update(
-            part="snippet,status,recordingDetails",
-            body={**body, "id": vid},
-        )
-        response = request.execute()
+    source = load_conference_source(Config)
+
+    with state:
+        for session in source.iter_sessions():
+            body = build_body(session)
+            vid = state.find_video_by_session(session.id)
+            if vid is None:
+                try:
+                    vid = choose_video(session, video_records, "title")
+                except ValueError:
+                    print(f"No match, ignoring {session.title}")
+                    continue
+
+            digest = body_digest(body)
+            record = state.get_video(vid) or {}
+            if record.get("body_digest") == digest:
+                continue
+            # The status only applies on upload; sending it again would
+            # undo whatever --publish scheduled or made public since.
+            del body["status"]
+            print(f'Updating "{vid}" with "{body}"')
+
+            request = youtube.videos().update(
+                part=",".join(body.keys()),
+                body={**body, "id": vid},
+            )
+            response = request.execute()
+            state.update_video(
+                vid,
+                session_id=session.id,
+                title=response["snippet"]["title"],
+                description=response["snippet"]["description"],
+                etag=response["etag"],
+                body_digest=digest,
+            )
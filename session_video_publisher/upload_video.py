@@ -1,17 +1,24 @@
+import contextlib
 import functools
 import io
-import itertools
+import json
 import pathlib
+import typing
 
 import googleapiclient.http
-import requests
 import tqdm
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 
-from .common import build_body, choose_video
+from .claims import ClaimDirectory
+from .common import build_body, load_conference_source, match_videos
 from .config import ConfigUpload as Config
-from .info import Conference, ConferenceInfoSource
+from .info import ConferenceInfoSource, Session
+from .probe import require_ffprobe
+from .processing import summarize, wait_for_processing
+from .scan import VideoFile, VideoIndex
+from .state import StateStore, body_digest
+from .validate import check_media, quarantine
 
 
 def media_batch_reader(file_path, chunk_size=64 * (1 << 20)):
@@ -26,71 +33,245 @@ def media_batch_reader(file_path, chunk_size=64 * (1 << 20)):
     return out.getvalue()
 
 
-def upload_video():
-    Config.variable_check()
+def open_video_index(video_root: pathlib.Path) -> VideoIndex:
+    return VideoIndex(
+        video_root, Config.VIDEO_EXTENSIONS, Config.VIDEO_EXCLUDE
+    )
 
-    print("Uploading videos...")
 
-    # build youtube connection
+def scan_videos(
+    video_root: pathlib.Path,
+) -> typing.Tuple[VideoIndex, typing.List[VideoFile]]:
+    index = open_video_index(video_root)
+    videos = index.scan()
+    index.save()
+    return index, videos
+
+
+def iter_matches(
+    source: ConferenceInfoSource,
+    index: VideoIndex,
+    videos: typing.List[VideoFile],
+    state: StateStore,
+) -> typing.Iterator[typing.Tuple[Session, pathlib.Path]]:
+    pending = []
+    for session in source.iter_sessions():
+        uploaded_vid = state.find_video_by_session(session.id)
+        if uploaded_vid is not None:
+            print(
+                f"Already uploaded as {uploaded_vid}, skipping {session.title}"
+            )
+            continue
+        pending.append(session)
+
+    try:
+        matches = match_videos(pending, videos, index.probe)
+    finally:
+        index.save()
+
+    for session in pending:
+        video = matches.get(session.id)
+        if video is None:
+            print(f"No match, ignoring {session.title}")
+            continue
+        yield session, video.path
+
+
+def iter_plan_matches(
+    source: ConferenceInfoSource,
+    video_root: pathlib.Path,
+    plan: dict,
+    state: StateStore,
+) -> typing.Iterator[typing.Tuple[Session, pathlib.Path]]:
+    sessions = {session.id: session for session in source.iter_sessions()}
+    for entry in plan["uploads"]:
+        try:
+            session = sessions[entry["session_id"]]
+        except KeyError:
+            print(f"Session gone from schedule, ignoring {entry['title']}")
+            continue
+
+        # The plan may be run again after partial progress.
+        uploaded_vid = state.find_video_by_session(session.id)
+        if uploaded_vid is not None:
+            print(
+                f"Already uploaded as {uploaded_vid}, skipping {session.title}"
+            )
+            continue
+        vid_path = video_root.joinpath(entry["path"])
+        if not vid_path.exists():
+            print(f"File gone, skipping {session.title}")
+            continue
+        yield session, vid_path
+
+
+def upload_one(youtube, session: Session, vid_path: pathlib.Path) -> dict:
+    body = build_body(session)
+
+    print(f"Uploading {session.title}")
+    print(f"    {vid_path}")
+
+    media = googleapiclient.http.MediaInMemoryUpload(
+        media_batch_reader(vid_path), resumable=True
+    )
+    request = youtube.videos().insert(
+        part=",".join(body.keys()), body=body, media_body=media
+    )
+
+    with tqdm.tqdm(total=100, ascii=True) as progressbar:
+        prev = 0
+        while True:
+            status, response = request.next_chunk()
+            if status:
+                curr = int(status.progress() * 100)
+                progressbar.update(curr - prev)
+                prev = curr
+            if response:
+                break
+    print(f"    Done, as: https://youtu.be/{response['id']}")
+    return {**response, "body_digest": body_digest(body)}
+
+
+def build_upload_client(read_back: bool = False):
+    """Connect to YouTube for uploading.
+
+    The upload-only scope can't read anything back, such as the processing
+    status `--wait` polls for, so `read_back` asks for the full scope too.
+    """
+    scopes = [Config.YOUTUBE_UPLOAD_SCOPE]
+    if read_back:
+        scopes.append(Config.YOUTUBE_SCOPE)
     flow = InstalledAppFlow.from_client_secrets_file(
-        Config.OAUTH2_CLIENT_SECRET, scopes=[Config.YOUTUBE_UPLOAD_SCOPE]
+        Config.OAUTH2_CLIENT_SECRET, scopes=scopes
     )
     credentials = flow.run_console()
 
-    youtube = build("youtube", "v3", credentials=credentials)
+    return build("youtube", "v3", credentials=credentials)
+
+
+def validate_or_quarantine(
+    session: Session, video_root: pathlib.Path, video: VideoFile
+) -> bool:
+    problems = check_media(video.probe, session)
+    if not problems:
+        return True
+    print(f"Invalid video for {session.title}, quarantining")
+    for problem in problems:
+        print(f"    {problem}")
+    print(f"    {video.path} -> {quarantine(video_root, video.path)}")
+    return False
+
+
+def upload_and_archive(
+    youtube,
+    session: Session,
+    video_root: pathlib.Path,
+    vid_path: pathlib.Path,
+    state: StateStore,
+) -> str:
+    """Upload a file, record it, and move it into done/."""
+    response = upload_one(youtube, session, vid_path)
+    with state:
+        state.update_video(
+            response["id"],
+            session_id=session.id,
+            title=response["snippet"]["title"],
+            description=response["snippet"]["description"],
+            etag=response["etag"],
+            body_digest=response["body_digest"],
+            status="uploaded",
+        )
+
+    new_name = video_root.joinpath("done", vid_path.relative_to(video_root))
+    new_name.parent.mkdir(parents=True, exist_ok=True)
+    print(f"    {vid_path} -> {new_name}")
+    vid_path.rename(new_name)
+    with state:
+        state.update_video(response["id"], file=str(new_name))
+    return response["id"]
+
+
+def upload_video(
+    plan_file: typing.Optional[str] = None,
+    shard: bool = False,
+    wait: bool = False,
+):
+    Config.variable_check()
+    require_ffprobe()
+
+    print("Uploading videos...")
+
+    # build youtube connection
+    youtube = build_upload_client(read_back=wait)
 
     # upload video
     VIDEO_ROOT = pathlib.Path(Config.VIDEO_ROOT).resolve()
+
+    source = load_conference_source(Config)
+
+    state = StateStore(Config.STATE_PATH)
+
     print(f"Reading video files from {VIDEO_ROOT}")
+    index, VIDEOS = scan_videos(VIDEO_ROOT)
+    assert VIDEOS
+    print(f"    {len(VIDEOS)} files loaded")
+    index.probe_many(VIDEOS)
+    index.save()
+    videos_by_path = {video.path: video for video in VIDEOS}
 
-    VIDEO_PATHS = list(
-        itertools.chain.from_iterable(
-            VIDEO_ROOT.glob(f"*{ext}") for ext in (".avi", ".mp4")
+    if plan_file:
+        print(f"Reading upload plan from {plan_file}")
+        with open(plan_file, encoding="utf-8") as f:
+            plan = json.load(f)
+        matches = iter_plan_matches(source, VIDEO_ROOT, plan, state)
+    else:
+        matches = iter_matches(source, index, VIDEOS, state)
+
+    if shard:
+        claims: typing.Optional[ClaimDirectory] = ClaimDirectory(
+            VIDEO_ROOT.joinpath("claims"), Config.CLAIM_LEASE_SECONDS
         )
-    )
-    assert VIDEO_PATHS
-    print(f"    {len(VIDEO_PATHS)} files loaded")
+    else:
+        claims = None
 
-    DONE_DIR_PATH = VIDEO_ROOT.joinpath("done")
-    DONE_DIR_PATH.mkdir(parents=True, exist_ok=True)
+    uploaded_ids = []
 
-    source = ConferenceInfoSource(
-        requests.get(Config.URL).json(),
-        Conference(
-            Config.CONFERENCE_NAME, Config.FIRST_DATE, Config.TIMEZONE_TAIPEI
-        ),
-    )
+    for session, vid_path in matches:
+        if claims is not None:
+            if not claims.claim(session.id):
+                print(f"Claimed by another host, skipping {session.title}")
+                continue
+            if not vid_path.exists():
+                # Moved away by another host after we listed the directory.
+                claims.release(session.id)
+                print(f"File gone, skipping {session.title}")
+                continue
 
-    for session in source.iter_sessions():
-        body = build_body(session)
-        try:
-            vid_path = choose_video(session, VIDEO_PATHS, "path")
-        except ValueError:
-            print(f"No match, ignoring {session.title}")
+        video = videos_by_path.get(vid_path)
+        if video is None:
+            # Only possible with a plan naming a file the scan skips.
+            if claims is not None:
+                claims.release(session.id)
+            print(f"Not a video in VIDEO_ROOT, skipping {vid_path}")
+            continue
+        if not validate_or_quarantine(session, VIDEO_ROOT, video):
+            if claims is not None:
+                claims.release(session.id)
             continue
 
-        print(f"Uploading {session.title}")
-        print(f"    {vid_path}")
+        if claims is None:
+            holding: typing.ContextManager = contextlib.nullcontext()
+        else:
+            holding = claims.holding(session.id)
 
-        media = googleapiclient.http.MediaInMemoryUpload(
-            media_batch_reader(vid_path), resumable=True
-        )
-        request = youtube.videos().insert(
-            part=",".join(body.keys()), body=body, media_body=media
-        )
+        with holding:
+            uploaded_ids.append(
+                upload_and_archive(
+                    youtube, session, VIDEO_ROOT, vid_path, state
+                )
+            )
 
-        with tqdm.tqdm(total=100, ascii=True) as progressbar:
-            prev = 0
-            while True:
-                status, response = request.next_chunk()
-                if status:
-                    curr = int(status.progress() * 100)
-                    progressbar.update(curr - prev)
-                    prev = curr
-                if response:
-                    break
-        print(f"    Done, as: https://youtu.be/{response['id']}")
-
-        new_name = DONE_DIR_PATH.joinpath(vid_path.name)
-        print(f"    {vid_path} -> {new_name}")
-        vid_path.rename(new_name)
+    if wait and uploaded_ids:
+        print(f"Waiting for {len(uploaded_ids)} videos to be processed...")
+        statuses = wait_for_processing(youtube, uploaded_ids, state)
+        print(f"    {summarize(statuses)}")
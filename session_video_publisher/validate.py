@@ -0,0 +1,90 @@
+import fractions
+import pathlib
+import typing
+
+from .info import Session
+from .probe import get_duration
+
+QUARANTINE_DIR_NAME = "quarantine"
+
+# Substrings of ffprobe's format_name we know YouTube accepts.
+KNOWN_CONTAINERS = ("avi", "mp4", "mov", "matroska", "mpegts")
+KNOWN_VIDEO_CODECS = (
+    "h264",
+    "hevc",
+    "mpeg4",
+    "mpeg2video",
+    "dvvideo",
+    "vp9",
+    "av1",
+)
+
+# A recording this much shorter than its slot is most likely truncated.
+MIN_DURATION_RATIO = 0.25
+
+
+def _display_aspect(stream: dict) -> typing.Optional[fractions.Fraction]:
+    dar = stream.get("display_aspect_ratio", "")
+    try:
+        num, den = (int(n) for n in dar.split(":"))
+        return fractions.Fraction(num, den)
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def check_media(
+    probe: typing.Optional[dict], session: typing.Optional[Session] = None
+) -> typing.List[str]:
+    """List what is wrong with a file, judging from its ffprobe output.
+
+    An empty list means the file looks fine to upload. Callers make sure
+    ffprobe is there up front (see `require_ffprobe`), so a file without
+    probe data was never looked at and doesn't pass either.
+    """
+    if probe is None:
+        return ["not probed"]
+    if "error" in probe:
+        return [f"ffprobe failed: {probe['error']}"]
+
+    problems = []
+
+    format_name = probe.get("format", {}).get("format_name", "")
+    if not any(name in format_name for name in KNOWN_CONTAINERS):
+        problems.append(f"unexpected container {format_name!r}")
+
+    streams = probe.get("streams", [])
+    video_streams = [s for s in streams if s.get("codec_type") == "video"]
+    if not video_streams:
+        problems.append("no video stream")
+    for stream in video_streams:
+        codec = stream.get("codec_name")
+        if codec not in KNOWN_VIDEO_CODECS:
+            problems.append(f"unexpected video codec {codec!r}")
+        # DVD recordings must be fixed up to 4:3 by dvd540fix first.
+        if (stream.get("width"), stream.get("height")) == (720, 480):
+            if _display_aspect(stream) != fractions.Fraction(4, 3):
+                problems.append("720x480 without 4:3 aspect, run dvd540fix")
+    if not any(s.get("codec_type") == "audio" for s in streams):
+        problems.append("no audio stream")
+
+    duration = get_duration(probe)
+    if not duration:
+        problems.append("no duration, file is probably truncated")
+    elif session is not None:
+        expected = (session.end - session.start).total_seconds()
+        if expected > 0 and duration < expected * MIN_DURATION_RATIO:
+            problems.append(
+                f"only {duration / 60:.0f} minutes long, "
+                f"session slot is {expected / 60:.0f} minutes"
+            )
+
+    return problems
+
+
+def quarantine(video_root: pathlib.Path, path: pathlib.Path) -> pathlib.Path:
+    new_path = video_root.joinpath(
+        QUARANTINE_DIR_NAME, path.relative_to(video_root)
+    )
+    new_path.parent.mkdir(parents=True, exist_ok=True)
+    path.rename(new_path)
+    return new_path
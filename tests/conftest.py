@@ -0,0 +1,59 @@
+import datetime
+import typing
+
+import pytest
+
+from session_video_publisher.info import Conference, ConferenceInfoSource
+from session_video_publisher.timeutil import get_timezone
+
+DAY1 = datetime.date(2022, 9, 3)
+
+
+@pytest.fixture()
+def conference() -> Conference:
+    return Conference("PyCon Taiwan 2022", DAY1, get_timezone("Asia/Taipei"))
+
+
+def session_data(
+    sid: str,
+    title: str,
+    start: str,
+    end: str,
+    room: str = "r1",
+    speakers: typing.Sequence[str] = ("sp0",),
+    kind: str = "talk",
+) -> dict:
+    """One session as the conference API returns it."""
+    return {
+        "id": sid,
+        "type": kind,
+        "tags": [],
+        "en": {"title": title, "description": f"About {title}."},
+        "start": start,
+        "end": end,
+        "slide": "",
+        "speakers": list(speakers),
+        "room": room,
+    }
+
+
+def make_source_data(sessions: typing.List[dict], n_speakers: int = 1) -> dict:
+    return {
+        "rooms": [{"id": f"r{i}", "en": {"name": f"R{i}"}} for i in range(4)],
+        "speakers": [
+            {"id": f"sp{i}", "en": {"name": f"Speaker {i}", "bio": "Bio."}}
+            for i in range(n_speakers)
+        ],
+        "sessions": sessions,
+    }
+
+
+@pytest.fixture()
+def make_sessions(conference):
+    def make(sessions: typing.List[dict], n_speakers: int = 1):
+        source = ConferenceInfoSource(
+            make_source_data(sessions, n_speakers), conference
+        )
+        return list(source.iter_sessions())
+
+    return make
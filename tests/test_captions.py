@@ -0,0 +1,230 @@
+import concurrent.futures
+import hashlib
+import os
+import pathlib
+import stat
+import sys
+import time
+
+import pytest
+
+from session_video_publisher import captions
+from session_video_publisher.config import ConfigCaptions as Config
+from session_video_publisher.info import ConferenceInfoSource
+from session_video_publisher.state import StateStore
+
+from .conftest import make_source_data, session_data
+
+# Stands in for ffmpeg: writes three seconds of "audio" (a 44-byte header and
+# 16-bit mono at 16 kHz), or fails on inputs marked as broken.
+STUB_FFMPEG = """\
+import sys
+
+with open(sys.argv[sys.argv.index("-i") + 1], "rb") as f:
+    if f.read().startswith(b"BROKEN"):
+        sys.stderr.write("Invalid data found when processing input\\n")
+        sys.exit(1)
+with open(sys.argv[-1], "wb") as f:
+    f.write(bytes(44 + 16000 * 2 * 3))
+"""
+
+STUB_SPEC = f"{__name__}:stub_recognizer"
+OTHER_SPEC = f"{__name__}:other_recognizer"
+CPU_SPEC = f"{__name__}:cpu_recognizer"
+
+N_BENCHMARK_VIDEOS = 12
+# SHA-256 rounds per second of audio, standing in for a model's work.
+CPU_WORK_PER_SECOND = 10000
+
+
+def stub_recognizer(wav_path, language, model):
+    return [(0.0, 1.5, "Hello"), (1.5, 2.0, ""), (2.0, 3.0, "world")]
+
+
+def other_recognizer(wav_path, language, model):
+    return [(0.0, 3.0, "Something else")]
+
+
+def cpu_recognizer(wav_path, language, model):
+    seconds = (os.path.getsize(wav_path) - 44) / (16000 * 2)
+    digest = b""
+    for _ in range(int(seconds * CPU_WORK_PER_SECOND)):
+        digest = hashlib.sha256(digest).digest()
+    return [(0.0, seconds, digest.hex())]
+
+
+@pytest.fixture()
+def stub_ffmpeg(tmp_path, monkeypatch):
+    path = tmp_path.joinpath("ffmpeg")
+    path.write_text(f"#!{sys.executable}\n{STUB_FFMPEG}")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(captions, "FFMPEG", str(path))
+    return path
+
+
+def test_render_srt():
+    assert captions.render_srt(stub_recognizer("", "en", "small")) == (
+        "1\n00:00:00,000 --> 00:00:01,500\nHello\n\n"
+        "3\n00:00:02,000 --> 00:00:03,000\nworld\n\n"
+    )
+
+
+def test_cache_is_per_recognizer(tmp_path, stub_ffmpeg):
+    video = tmp_path.joinpath("talk.mp4")
+    video.write_bytes(b"video")
+    cache_dir = tmp_path.joinpath("cache")
+    cache_dir.mkdir()
+
+    srt_path, audio_seconds, _ = captions.transcribe_video(
+        video, "en", cache_dir, "small", STUB_SPEC
+    )
+    assert audio_seconds == 3
+    assert "Hello" in srt_path.read_text(encoding="utf-8")
+
+    # Same video again: a cache hit, even after a rename.
+    renamed = tmp_path.joinpath("renamed.mp4")
+    video.rename(renamed)
+    assert captions.transcribe_video(
+        renamed, "en", cache_dir, "small", STUB_SPEC
+    ) == (srt_path, 0.0, 0.0)
+
+    # A different recognizer doesn't get the stub's captions.
+    other_path, audio_seconds, _ = captions.transcribe_video(
+        renamed, "en", cache_dir, "small", OTHER_SPEC
+    )
+    assert other_path != srt_path
+    assert audio_seconds == 3
+    assert "Something else" in other_path.read_text(encoding="utf-8")
+
+
+@pytest.fixture()
+def caption_env(tmp_path, monkeypatch):
+    for name, value in {
+        "YEAR": "2022",
+        "MONTH": "9",
+        "DAY": "3",
+        "OAUTH2_CLIENT_SECRET": "secret.json",
+        "URL": "https://example.com/api",
+        "CAPTION_RECOGNIZER": STUB_SPEC,
+    }.items():
+        monkeypatch.setenv(name, value)
+
+
+def prepare_stage(tmp_path, mocker, conference, contents):
+    """Set up a state file with one uploaded video per item of `contents`.
+
+    Returns the mocked upload_caption.
+    """
+    source = ConferenceInfoSource(
+        make_source_data(
+            [
+                session_data(
+                    f"s{i}",
+                    f"Talk {i}",
+                    "2022-09-03T02:00:00Z",
+                    "2022-09-03T02:30:00Z",
+                )
+                for i in range(len(contents))
+            ]
+        ),
+        conference,
+    )
+    state = StateStore(pathlib.Path(Config.STATE_PATH))
+    for i, content in enumerate(contents):
+        video = tmp_path.joinpath(f"talk{i}.mp4")
+        video.write_bytes(content)
+        state.update_video(f"vid{i}", session_id=f"s{i}", file=str(video))
+    state.save()
+
+    mocker.patch.object(captions, "InstalledAppFlow")
+    mocker.patch.object(captions, "build")
+    mocker.patch.object(
+        captions, "load_conference_source", return_value=source
+    )
+    return mocker.patch.object(captions, "upload_caption")
+
+
+def test_broken_file_does_not_stop_the_stage(
+    tmp_path, stub_ffmpeg, caption_env, mocker, monkeypatch, conference
+):
+    monkeypatch.setenv("STATE_PATH", str(tmp_path.joinpath("state.json")))
+    monkeypatch.setenv("CAPTION_CACHE", str(tmp_path.joinpath("cache")))
+    upload_caption = prepare_stage(
+        tmp_path, mocker, conference, [b"video 0", b"BROKEN", b"video 2"]
+    )
+    # Threads share the stubbed FFMPEG setting; worker processes might not.
+    mocker.patch.object(
+        captions.concurrent.futures,
+        "ProcessPoolExecutor",
+        concurrent.futures.ThreadPoolExecutor,
+    )
+
+    captions.generate_captions()
+
+    uploaded = [args[1] for args, _ in upload_caption.call_args_list]
+    assert sorted(uploaded) == ["vid0", "vid2"]
+    state = StateStore(tmp_path.joinpath("state.json"))
+    assert state.get_video("vid0")["caption"] == "zh-hant"
+    assert "caption" not in state.get_video("vid1")
+
+
+def test_missing_tools_stop_before_oauth(
+    tmp_path, stub_ffmpeg, caption_env, mocker, monkeypatch
+):
+    flow = mocker.patch.object(captions, "InstalledAppFlow")
+
+    monkeypatch.setenv("CAPTION_RECOGNIZER", f"{__name__}:no_such_function")
+    with pytest.raises(SystemExit, match="no_such_function"):
+        captions.generate_captions()
+
+    monkeypatch.setenv("CAPTION_RECOGNIZER", "")
+    mocker.patch.object(
+        captions.importlib.util, "find_spec", return_value=None
+    )
+    with pytest.raises(SystemExit, match="faster-whisper"):
+        captions.generate_captions()
+
+    monkeypatch.setenv("CAPTION_RECOGNIZER", STUB_SPEC)
+    monkeypatch.setattr(captions, "FFMPEG", str(tmp_path.joinpath("nope")))
+    with pytest.raises(SystemExit, match="ffmpeg not found"):
+        captions.generate_captions()
+
+    flow.from_client_secrets_file.assert_not_called()
+
+
+def test_worker_pool_throughput(
+    tmp_path, stub_ffmpeg, caption_env, mocker, monkeypatch, conference
+):
+    # Spawned workers re-read FFMPEG from the environment.
+    monkeypatch.setenv("FFMPEG", str(stub_ffmpeg))
+    monkeypatch.setenv("CAPTION_RECOGNIZER", CPU_SPEC)
+    workers = min(os.cpu_count() or 1, 4)
+
+    def run(name, n_workers):
+        run_dir = tmp_path.joinpath(name)
+        run_dir.mkdir()
+        monkeypatch.setenv("STATE_PATH", str(run_dir.joinpath("state.json")))
+        monkeypatch.setenv("CAPTION_CACHE", str(run_dir.joinpath("cache")))
+        monkeypatch.setenv("CAPTION_WORKERS", str(n_workers))
+        upload_caption = prepare_stage(
+            run_dir,
+            mocker,
+            conference,
+            [f"video {i}".encode() for i in range(N_BENCHMARK_VIDEOS)],
+        )
+        started = time.perf_counter()
+        captions.generate_captions()
+        elapsed = time.perf_counter() - started
+        assert upload_caption.call_count == N_BENCHMARK_VIDEOS
+        return elapsed
+
+    serial = run("serial", 1)
+    parallel = run("parallel", workers)
+    audio = N_BENCHMARK_VIDEOS * 3
+    print(
+        f"{audio}s of audio: {audio / serial:.0f}x realtime with 1 worker, "
+        f"{audio / parallel:.0f}x with {workers}"
+    )
+    # The pool must not eat the gain from extra workers, nor cost much on
+    # a single CPU.
+    assert serial / parallel > 0.5 * workers
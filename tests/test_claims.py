@@ -0,0 +1,117 @@
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from session_video_publisher.claims import ClaimDirectory
+
+N_WORKERS = 6
+N_KEYS = 200
+
+
+def _worker(root, log_dir, keys, start):
+    claims = ClaimDirectory(root, lease_seconds=60)
+    start.wait()
+    for key in keys:
+        if not claims.claim(key):
+            continue
+        with claims.holding(key):
+            # One line per "upload"; O_APPEND keeps concurrent writes whole.
+            with open(os.path.join(log_dir, key), "a") as f:
+                f.write(f"{os.getpid()}\n")
+
+
+def test_each_key_completes_once_across_processes(tmp_path):
+    root = tmp_path.joinpath("claims")
+    log_dir = tmp_path.joinpath("log")
+    log_dir.mkdir()
+    keys = [f"session-{i}" for i in range(N_KEYS)]
+
+    start = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(
+            target=_worker,
+            # Different orders so workers collide all over the key space.
+            args=(root, log_dir, keys[i:] + keys[:i], start),
+        )
+        for i in range(0, N_KEYS, N_KEYS // N_WORKERS)[:N_WORKERS]
+    ]
+    for worker in workers:
+        worker.start()
+    start.set()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    uploads = {
+        key: log_dir.joinpath(key).read_text().split()
+        for key in keys
+        if log_dir.joinpath(key).exists()
+    }
+    assert sorted(uploads) == sorted(keys)
+    assert all(len(pids) == 1 for pids in uploads.values())
+    # The work really was shared out.
+    assert len({pids[0] for pids in uploads.values()}) > 1
+    assert sorted(p.name for p in root.iterdir()) == sorted(
+        f"{key}.done" for key in keys
+    )
+
+
+def _write_lock(path, owner):
+    path.write_text(json.dumps({**owner, "claimed": time.time()}))
+
+
+def test_dead_pid_lock_is_taken_over(tmp_path):
+    claims = ClaimDirectory(tmp_path, lease_seconds=60)
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    _write_lock(
+        tmp_path.joinpath("s1.lock"),
+        {"host": socket.gethostname(), "pid": dead.pid},
+    )
+
+    assert claims.claim("s1")
+    owner = json.loads(tmp_path.joinpath("s1.lock").read_text())
+    assert owner["pid"] == os.getpid()
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    claims = ClaimDirectory(tmp_path, lease_seconds=60)
+    lock_path = tmp_path.joinpath("s1.lock")
+    _write_lock(lock_path, {"host": "elsewhere", "pid": 1})
+    old = time.time() - 120
+    os.utime(lock_path, (old, old))
+
+    assert claims.claim("s1")
+
+
+def test_live_claims_are_respected(tmp_path):
+    claims = ClaimDirectory(tmp_path, lease_seconds=60)
+    # Another host still heartbeating; its PID means nothing here.
+    _write_lock(tmp_path.joinpath("s1.lock"), {"host": "elsewhere", "pid": 1})
+    # A live process on this host.
+    _write_lock(
+        tmp_path.joinpath("s2.lock"),
+        {"host": socket.gethostname(), "pid": os.getppid()},
+    )
+    tmp_path.joinpath("s3.done").touch()
+
+    assert not claims.claim("s1")
+    assert not claims.claim("s2")
+    assert not claims.claim("s3")
+
+
+def test_holding_releases_on_error(tmp_path):
+    claims = ClaimDirectory(tmp_path, lease_seconds=60)
+    assert claims.claim("s1")
+    try:
+        with claims.holding("s1"):
+            raise RuntimeError("upload failed")
+    except RuntimeError:
+        pass
+    assert not tmp_path.joinpath("s1.lock").exists()
+    assert not tmp_path.joinpath("s1.done").exists()
+    assert claims.claim("s1")
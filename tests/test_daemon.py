@@ -0,0 +1,183 @@
+import collections
+import sys
+import types
+
+import pytest
+import requests
+
+from session_video_publisher import daemon, scan
+from session_video_publisher.daemon import FolderWatcher
+from session_video_publisher.info import ConferenceInfoSource
+
+from .conftest import make_source_data, session_data
+
+Event = collections.namedtuple("Event", "wd mask cookie name")
+
+
+class FakeINotify:
+    def __init__(self):
+        self.watched = []
+        self.reads = []
+
+    def add_watch(self, path, mask):
+        self.watched.append(path)
+
+    def read(self, timeout=None):
+        return self.reads.pop(0) if self.reads else []
+
+
+@pytest.fixture()
+def fake_inotify(monkeypatch):
+    inotify = FakeINotify()
+    module = types.SimpleNamespace(
+        INotify=lambda: inotify,
+        flags=types.SimpleNamespace(CLOSE_WRITE=8, MOVED_TO=128, CREATE=256),
+    )
+    monkeypatch.setitem(sys.modules, "inotify_simple", module)
+    return inotify
+
+
+def test_watcher_skips_uploader_directories(tmp_path, fake_inotify):
+    for name in ["R0/day1", "done/R0", "quarantine", "claims", ".cache"]:
+        tmp_path.joinpath(name).mkdir(parents=True)
+
+    FolderWatcher(tmp_path)
+
+    assert sorted(fake_inotify.watched) == [
+        str(tmp_path),
+        str(tmp_path.joinpath("R0")),
+        str(tmp_path.joinpath("R0", "day1")),
+    ]
+
+
+def test_watcher_ignores_its_own_writes(tmp_path, fake_inotify):
+    watcher = FolderWatcher(tmp_path)
+    fake_inotify.reads = [
+        # What saving the index and archiving an upload look like.
+        [
+            Event(1, 8, 0, ".video-index.json.host.42.tmp"),
+            Event(1, 128, 0, ".video-index.json"),
+            Event(1, 256, 0, "done"),
+        ],
+        [Event(1, 8, 0, "talk.mp4")],
+        [Event(1, 8, 0, "later.mp4")],
+    ]
+
+    watcher.wait(60)
+
+    # Woken by talk.mp4, not by the index; later.mp4 is left for next time.
+    assert fake_inotify.reads == [[Event(1, 8, 0, "later.mp4")]]
+
+
+def test_watcher_times_out_on_ignored_events(tmp_path, fake_inotify):
+    watcher = FolderWatcher(tmp_path)
+    fake_inotify.reads = [[Event(1, 128, 0, ".video-index.json")]]
+
+    watcher.wait(60)
+
+    assert fake_inotify.reads == []
+
+
+class StopWatching(Exception):
+    pass
+
+
+@pytest.fixture()
+def video_root(mocker, monkeypatch, tmp_path):
+    video_root = tmp_path.joinpath("videos")
+    video_root.mkdir()
+    for name, value in {
+        "YEAR": "2022",
+        "MONTH": "9",
+        "DAY": "3",
+        "OAUTH2_CLIENT_SECRET": "secret.json",
+        "URL": "https://example.com/api",
+        "VIDEO_ROOT": str(video_root),
+        "STATE_PATH": str(tmp_path.joinpath("state.json")),
+        "WATCH_SETTLE_SECONDS": "0",
+        "WATCH_REFRESH_SECONDS": "0",
+    }.items():
+        monkeypatch.setenv(name, value)
+    mocker.patch.object(daemon, "require_ffprobe")
+    mocker.patch.object(daemon, "build_upload_client")
+    mocker.patch.object(
+        scan, "probe_media", return_value={"format": {"duration": "1800"}}
+    )
+    mocker.patch.object(daemon, "validate_or_quarantine", return_value=True)
+    return video_root
+
+
+def schedule(conference, with_talk=True):
+    talk = session_data(
+        "s1",
+        "Async Python Internals",
+        "2022-09-03T02:00:00Z",
+        "2022-09-03T02:30:00Z",
+    )
+    return ConferenceInfoSource(
+        make_source_data([talk] if with_talk else []), conference
+    )
+
+
+def watch(mocker, sources, waits):
+    """Run watch_folder for one round more than there are `waits`.
+
+    Each of `waits` is called (if not None) in place of a round's sleep.
+    Returns the (session ID, file name) pairs it uploaded.
+    """
+    waits = iter(waits)
+
+    def wait(timeout):
+        try:
+            between_rounds = next(waits)
+        except StopIteration:
+            raise StopWatching
+        if between_rounds is not None:
+            between_rounds()
+
+    mocker.patch.object(daemon, "load_conference_source", side_effect=sources)
+    upload_and_archive = mocker.patch.object(daemon, "upload_and_archive")
+    watcher = mocker.patch.object(daemon, "FolderWatcher").return_value
+    watcher.wait.side_effect = wait
+
+    with pytest.raises(StopWatching):
+        daemon.watch_folder()
+
+    return [
+        (session.id, path.name)
+        for (_, session, _, path, _), _ in upload_and_archive.call_args_list
+    ]
+
+
+def test_schedule_refresh_retries_unmatched_files(
+    mocker, video_root, conference
+):
+    video_root.joinpath("Async Python Internals.mp4").write_bytes(b"")
+    # The talk is only added to the schedule after the file turned up.
+    sources = [schedule(conference, with_talk=False), schedule(conference)]
+
+    assert watch(mocker, sources, [None]) == [
+        ("s1", "Async Python Internals.mp4")
+    ]
+
+
+def test_failed_schedule_refresh_keeps_the_old_one(
+    mocker, video_root, conference
+):
+    def recording_finishes():
+        video_root.joinpath("Async Python Internals.mp4").write_bytes(b"")
+
+    sources = [schedule(conference), requests.ConnectionError("Wi-Fi down")]
+
+    assert watch(mocker, sources, [recording_finishes]) == [
+        ("s1", "Async Python Internals.mp4")
+    ]
+
+
+def test_first_schedule_fetch_is_retried(mocker, video_root, conference):
+    video_root.joinpath("Async Python Internals.mp4").write_bytes(b"")
+    sources = [ValueError("not JSON"), schedule(conference)]
+
+    assert watch(mocker, sources, [None]) == [
+        ("s1", "Async Python Internals.mp4")
+    ]
@@ -0,0 +1,157 @@
+import glob
+import json
+import os
+import re
+import sys
+import timeit
+
+import pytest
+
+from session_video_publisher import generate_playlist
+from session_video_publisher.generate_playlist import (
+    PYARROW_MIN_VERSION,
+    write_json_files,
+    write_ndjson,
+    write_parquet,
+)
+
+N_VIDEOS = 500
+
+TITLES = [
+    "Async Python Internals – PyCon Taiwan 2022",
+    "用 Python 打造自己的工具 – PyCon Taiwan 2022",
+    "Pythonで始めるデータ分析 – PyCon Taiwan 2022",
+    "파이썬으로 데이터 분석하기 😀 – PyCon Taiwan 2022",
+]
+
+
+def video_records(n):
+    records = {}
+    for i in range(n):
+        vid = f"vid{i:05d}"
+        title = f"{TITLES[i % len(TITLES)]} #{i}"
+        records[vid] = {
+            "data": {
+                "description": f"Day 1, R0 09:00–09:30\n\n講者介紹 {i}\n" * 10,
+                "speakers": [f"講者 {i}", "Speaker Two"],
+                "recorded": "2022-09-03",
+                "title": title,
+                "thumbnail_url": f"https://i.ytimg.com/vi/{vid}/hq.jpg",
+                "videos": [
+                    {
+                        "type": "youtube",
+                        "url": f"https://www.youtube.com/watch?v={vid}",
+                    }
+                ],
+            }
+        }
+    return records
+
+
+def test_ndjson_index_offsets_round_trip(tmp_path):
+    records = video_records(40)
+    write_ndjson(records, str(tmp_path))
+
+    with open(tmp_path.joinpath("videos.ndjson.idx.json")) as f:
+        index = json.load(f)
+    assert sorted(index) == sorted(records)
+
+    # Seek straight to each record, in an order unlike the file's.
+    with open(tmp_path.joinpath("videos.ndjson"), "rb") as f:
+        for vid in sorted(index, reverse=True):
+            offset, length = index[vid]
+            f.seek(offset)
+            line = f.read(length)
+            assert json.loads(line.decode("utf-8")) == {
+                "vid": vid,
+                **records[vid]["data"],
+            }
+            assert f.read(1) == b"\n"
+
+
+def test_ndjson_streams_line_by_line(tmp_path):
+    records = video_records(40)
+    write_ndjson(records, str(tmp_path))
+
+    with open(tmp_path.joinpath("videos.ndjson"), encoding="utf-8") as f:
+        read = [json.loads(line) for line in f]
+    assert [r.pop("vid") for r in read] == list(records)
+    assert read == [record["data"] for record in records.values()]
+
+
+def test_ndjson_benchmark(tmp_path, monkeypatch):
+    # The pinned slugify release only runs on Python 2; the benchmark is
+    # about file I/O, so any unique file name will do.
+    monkeypatch.setattr(
+        generate_playlist, "slugify", lambda name: re.sub(r"[^\w-]", "", name)
+    )
+    records = video_records(N_VIDEOS)
+    per_file_dir = tmp_path.joinpath("per-file")
+    per_file_dir.mkdir()
+    ndjson_dir = tmp_path.joinpath("ndjson")
+    ndjson_dir.mkdir()
+
+    def load_per_file():
+        loaded = []
+        for path in glob.glob(os.path.join(per_file_dir, "*.json")):
+            with open(path, encoding="utf-8") as f:
+                loaded.append(json.load(f))
+        return loaded
+
+    def load_ndjson():
+        with open(ndjson_dir.joinpath("videos.ndjson"), encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    write_per_file = min(
+        timeit.repeat(
+            lambda: write_json_files(records, str(per_file_dir)),
+            number=1,
+            repeat=3,
+        )
+    )
+    write_one = min(
+        timeit.repeat(
+            lambda: write_ndjson(records, str(ndjson_dir)), number=1, repeat=3
+        )
+    )
+    assert len(load_per_file()) == len(load_ndjson()) == N_VIDEOS
+    read_per_file = min(timeit.repeat(load_per_file, number=1, repeat=5))
+    read_one = min(timeit.repeat(load_ndjson, number=1, repeat=5))
+
+    print(
+        f"{N_VIDEOS} videos: write {write_per_file * 1000:.1f} ms per-file "
+        f"vs {write_one * 1000:.1f} ms NDJSON, read "
+        f"{read_per_file * 1000:.1f} ms vs {read_one * 1000:.1f} ms"
+    )
+    # Reading is what the site generator does on every build.
+    assert read_one < read_per_file
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip("pyarrow", minversion=f"{PYARROW_MIN_VERSION}.0")
+    import pyarrow.parquet
+
+    records = video_records(40)
+    write_parquet(records, str(tmp_path))
+
+    rows = pyarrow.parquet.read_table(
+        tmp_path.joinpath("videos.parquet")
+    ).to_pylist()
+    assert [row["vid"] for row in rows] == sorted(records)
+    for row in rows:
+        data = records[row["vid"]]["data"]
+        assert row == {
+            "vid": row["vid"],
+            "title": data["title"],
+            "description": data["description"],
+            "speakers": data["speakers"],
+            "recorded": data["recorded"],
+            "thumbnail_url": data["thumbnail_url"],
+            "url": data["videos"][0]["url"],
+        }
+
+
+def test_parquet_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(SystemExit, match="pyarrow 7 or later"):
+        write_parquet(video_records(1), str(tmp_path))
@@ -0,0 +1,77 @@
+import string
+import timeit
+
+import pytest
+
+from session_video_publisher.common import guess_language, guess_languages
+
+
+def _loop_guess_language(s: str) -> str:
+    # The per-character loop guess_language used before the batched detector.
+    if sum(c in string.ascii_letters for c in s) > len(s) / 2:
+        return "en"
+    return "zh-hant"
+
+
+@pytest.mark.parametrize(
+    "s, expected",
+    [
+        ("Async Python Internals", "en"),
+        ("Keynote: 用 Python 寫遊戲", "en"),
+        ("這是一個關於資料的演講", "zh-hant"),
+        ("这是一个关于数据的演讲", "zh-hans"),
+        ("Pythonで始めるデータ分析", "ja"),
+        ("파이썬으로 데이터 분석하기", "ko"),
+        # A lone "の" is common in Taiwanese titles.
+        ("資料科學の入門", "zh-hant"),
+        ("用 Python 打造自己の工具", "zh-hant"),
+        ("", "zh-hant"),
+    ],
+)
+def test_guess_language(s, expected):
+    assert guess_language(s) == expected
+
+
+def test_guess_languages_batch():
+    strings = ["Async Python Internals", "這是一個演講", "这是一个演讲"]
+    assert guess_languages(strings) == [guess_language(s) for s in strings]
+
+
+def test_agrees_with_loop_on_english_and_traditional():
+    strings = [
+        "Async Python Internals",
+        "Keynote: 用 Python 寫遊戲",
+        "從零開始的 Django 網站",
+        "Python 與資料科學",
+    ]
+    assert guess_languages(strings) == [
+        _loop_guess_language(s) for s in strings
+    ]
+
+
+def test_guess_languages_benchmark():
+    # Titles and descriptions, roughly the mix a schedule produces.
+    strings = [
+        "Developing a web service with FastAPI",
+        "用 Python 打造自己的工具 – PyCon Taiwan 2022",
+        "這場演講會介紹如何用 Python 分析資料。" * 20,
+        "This talk walks through the CPython bytecode compiler. " * 20,
+    ] * 250
+
+    loop = min(
+        timeit.repeat(
+            lambda: [_loop_guess_language(s) for s in strings],
+            number=1,
+            repeat=5,
+        )
+    )
+    batched = min(
+        timeit.repeat(lambda: guess_languages(strings), number=1, repeat=5)
+    )
+
+    print(
+        f"{len(strings)} strings: loop {loop * 1000:.1f} ms, "
+        f"batched {batched * 1000:.1f} ms ({loop / batched:.1f}x)"
+    )
+    # About 2.5x faster here, despite telling five languages apart, not two.
+    assert batched < loop
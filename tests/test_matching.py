@@ -0,0 +1,226 @@
+import pathlib
+
+from session_video_publisher.common import match_videos
+from session_video_publisher.scan import VideoFile, _parse_hints
+
+from .conftest import session_data
+
+ROOT = pathlib.Path("/videos")
+
+
+def video(rel_path: str, created=None, duration=1800.0) -> VideoFile:
+    probe = {"format": {"duration": str(duration), "tags": {}}}
+    if created:
+        probe["format"]["tags"]["creation_time"] = created
+    path = ROOT.joinpath(rel_path)
+    return VideoFile(
+        path=path,
+        size=1,
+        mtime=0.0,
+        probe=probe,
+        **_parse_hints(path.relative_to(ROOT).parent.parts),
+    )
+
+
+def matched(sessions, videos):
+    matches = match_videos(sessions, videos, lambda v: v.probe)
+    return {
+        sid: video.path.relative_to(ROOT).as_posix()
+        for sid, video in matches.items()
+    }
+
+
+def lightning_talks(make_sessions):
+    return make_sessions(
+        [
+            session_data(
+                "lt1",
+                "Lightning Talks",
+                "2022-09-03T09:00:00Z",
+                "2022-09-03T09:30:00Z",
+                room="r0",
+            ),
+            session_data(
+                "lt2",
+                "Lightning Talks",
+                "2022-09-04T09:00:00Z",
+                "2022-09-04T09:30:00Z",
+                room="r0",
+            ),
+        ]
+    )
+
+
+def keynotes(make_sessions):
+    return make_sessions(
+        [
+            session_data(
+                "k1",
+                "Python in Education",
+                "2022-09-03T01:00:00Z",
+                "2022-09-03T02:00:00Z",
+                room="r0",
+                kind="keynote",
+            ),
+            session_data(
+                "k2",
+                "Async Python Internals",
+                "2022-09-04T01:00:00Z",
+                "2022-09-04T02:00:00Z",
+                room="r0",
+                kind="keynote",
+            ),
+        ]
+    )
+
+
+def test_colliding_lightning_talks_by_directory_hints(make_sessions):
+    sessions = lightning_talks(make_sessions)
+    videos = [
+        video("R0/day2/Lightning Talks.mp4"),
+        video("R0/day1/Lightning Talks.mp4"),
+    ]
+    assert matched(sessions, videos) == {
+        "lt1": "R0/day1/Lightning Talks.mp4",
+        "lt2": "R0/day2/Lightning Talks.mp4",
+    }
+
+
+def test_colliding_lightning_talks_by_recording_time(make_sessions):
+    sessions = lightning_talks(make_sessions)
+    # No hints in the directory names; "cam-a" sorts first but is day two.
+    videos = [
+        video("cam-a/Lightning Talks.mp4", "2022-09-04T08:58:00.000000Z"),
+        video("cam-b/Lightning Talks.mp4", "2022-09-03T08:59:00.000000Z"),
+    ]
+    assert matched(sessions, videos) == {
+        "lt1": "cam-b/Lightning Talks.mp4",
+        "lt2": "cam-a/Lightning Talks.mp4",
+    }
+
+
+def test_one_file_goes_to_one_session(make_sessions):
+    sessions = lightning_talks(make_sessions)
+    videos = [video("Lightning Talks.mp4", "2022-09-04T09:00:00.000000Z")]
+    assert matched(sessions, videos) == {"lt2": "Lightning Talks.mp4"}
+
+
+def test_colliding_keynotes(make_sessions):
+    sessions = keynotes(make_sessions)
+    videos = [
+        video("R0/Keynote: Async Python Internals.mp4", duration=3600),
+        video("R0/Keynote: Python in Education.mp4", duration=3600),
+    ]
+    assert matched(sessions, videos) == {
+        "k1": "R0/Keynote: Python in Education.mp4",
+        "k2": "R0/Keynote: Async Python Internals.mp4",
+    }
+
+
+def test_shared_prefix_is_not_a_match(make_sessions):
+    # Only the other keynote's file is there, in the right room and length.
+    sessions = keynotes(make_sessions)[1:]
+    videos = [video("R0/day2/Keynote: Python in Education.mp4", duration=3600)]
+    assert matched(sessions, videos) == {}
+
+
+def test_hints_and_duration_do_not_carry_an_unrelated_title(make_sessions):
+    sessions = make_sessions(
+        [
+            session_data(
+                "s1",
+                "Developing a web service with FastAPI",
+                "2022-09-03T03:00:00Z",
+                "2022-09-03T03:30:00Z",
+            )
+        ]
+    )
+    videos = [
+        video(
+            "R1/day1/Deploying a Django site with Docker.mp4",
+            "2022-09-03T03:00:00.000000Z",
+        )
+    ]
+    assert matched(sessions, videos) == {}
+
+
+def test_recording_at_another_time_loses_to_the_right_one(make_sessions):
+    sessions = make_sessions(
+        [
+            session_data(
+                "s1",
+                "Async Python Internals",
+                "2022-09-03T03:00:00Z",
+                "2022-09-03T03:30:00Z",
+            )
+        ]
+    )
+    videos = [
+        # A closer title, but recorded a day later.
+        video("a/Async Python Internals.mp4", "2022-09-04T03:00:00.000000Z"),
+        video("b/async-python-internals.mp4", "2022-09-03T02:58:00.000000Z"),
+    ]
+    assert matched(sessions, videos) == {"s1": "b/async-python-internals.mp4"}
+
+
+def test_contradicting_hints_are_ruled_out(make_sessions):
+    sessions = make_sessions(
+        [
+            session_data(
+                "s1",
+                "Async Python Internals",
+                "2022-09-03T03:00:00Z",
+                "2022-09-03T03:30:00Z",
+                room="r1",
+            )
+        ]
+    )
+    videos = [
+        video("R2/day1/Async Python Internals.mp4"),
+        video("R1/day2/Async Python Internals.mp4"),
+        video("2022-09-04/Async Python Internals.mp4"),
+    ]
+    assert matched(sessions, videos) == {}
+
+
+def dvd_video(rel_path: str, aspect: str) -> VideoFile:
+    recording = video(rel_path)
+    recording.probe["format"]["format_name"] = "avi"
+    recording.probe["streams"] = [
+        {
+            "codec_type": "video",
+            "codec_name": "mpeg4",
+            "width": 720,
+            "height": 480,
+            "display_aspect_ratio": aspect,
+        },
+        {"codec_type": "audio", "codec_name": "mp3"},
+    ]
+    return recording
+
+
+def test_dvd540fix_output_wins_over_its_input(make_sessions):
+    sessions = make_sessions(
+        [
+            session_data(
+                "s1",
+                "Async Python Internals",
+                "2022-09-03T03:00:00Z",
+                "2022-09-03T03:30:00Z",
+            )
+        ]
+    )
+    # Same name and score; "in/" sorts first but still needs fixing.
+    videos = [
+        dvd_video("in/Async Python Internals.avi", "3:2"),
+        dvd_video("out/Async Python Internals.avi", "4:3"),
+    ]
+    assert matched(sessions, videos) == {
+        "s1": "out/Async Python Internals.avi"
+    }
+
+    # Without a fixed copy the unfixed one is still matched, so that
+    # validation reports it.
+    assert matched(sessions, videos[:1]) == {
+        "s1": "in/Async Python Internals.avi"
+    }
@@ -0,0 +1,100 @@
+import pytest
+
+from session_video_publisher import processing
+from session_video_publisher.processing import (
+    MAX_IDS_PER_REQUEST,
+    MISSING_GRACE_SECONDS,
+    poll_processing,
+    wait_for_processing,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(processing, "time", clock)
+    return clock
+
+
+def item(vid, processing_status, upload_status="processed"):
+    return {
+        "id": vid,
+        "status": {"uploadStatus": upload_status},
+        "processingDetails": {"processingStatus": processing_status},
+    }
+
+
+def fake_youtube(mocker, responses):
+    """A client whose videos.list returns `responses(ids)` for each call."""
+    youtube = mocker.Mock()
+
+    def list_(part, id, maxResults):
+        ids = id.split(",")
+        assert len(ids) <= MAX_IDS_PER_REQUEST
+        request = mocker.Mock()
+        request.execute.return_value = {"items": responses(ids)}
+        return request
+
+    youtube.videos.return_value.list.side_effect = list_
+    return youtube
+
+
+def test_poll_processing_batches_and_leaves_out_missing(mocker):
+    ids = [f"v{i}" for i in range(120)]
+    youtube = fake_youtube(
+        mocker,
+        lambda ids: [item(vid, "succeeded") for vid in ids if vid != "v7"],
+    )
+    statuses = poll_processing(youtube, ids)
+    assert youtube.videos.return_value.list.call_count == 3
+    assert len(statuses) == 119
+    assert "v7" not in statuses
+
+
+def test_not_listed_yet_is_not_rejected(mocker, clock):
+    polls = []
+
+    def responses(ids):
+        polls.append(ids)
+        # The new upload only shows up on the third poll.
+        if len(polls) < 3:
+            return [item("old", "processing")]
+        return [item(vid, "succeeded") for vid in ids]
+
+    statuses = wait_for_processing(
+        fake_youtube(mocker, responses), ["old", "new"]
+    )
+    assert statuses == {"old": "succeeded", "new": "succeeded"}
+
+
+def test_gone_for_good_ends_up_missing(mocker, clock):
+    done = []
+    statuses = wait_for_processing(
+        fake_youtube(mocker, lambda ids: []),
+        ["gone"],
+        on_done=lambda vid, status: done.append((vid, status, clock.now)),
+    )
+    assert statuses == {"gone": "missing"}
+    assert done[0][2] >= MISSING_GRACE_SECONDS
+
+
+def test_failed_uploads_are_rejected(mocker, clock):
+    statuses = wait_for_processing(
+        fake_youtube(
+            mocker,
+            lambda ids: [item(vid, "processing", "rejected") for vid in ids],
+        ),
+        ["dup"],
+    )
+    assert statuses == {"dup": "rejected"}
@@ -0,0 +1,179 @@
+import datetime
+
+import pytest
+
+from session_video_publisher.publish import (
+    _published_sessions,
+    insert_into_playlist,
+    schedule_publishing,
+)
+from session_video_publisher.state import StateStore
+from session_video_publisher.timeutil import parse_datetime
+
+from .conftest import session_data
+
+
+@pytest.fixture()
+def pairs(make_sessions):
+    sessions = make_sessions(
+        [
+            session_data(
+                name,
+                f"Talk {name}",
+                f"2022-09-03T0{i}:00:00Z",
+                f"2022-09-03T0{i}:30:00Z",
+            )
+            for i, name in enumerate("ABC")
+        ]
+    )
+    return [(session, f"vid-{session.id}") for session in sessions]
+
+
+@pytest.fixture()
+def publish_env(monkeypatch):
+    monkeypatch.setenv("PUBLISH_START", "2022-10-01T00:00:00Z")
+    monkeypatch.setenv("PUBLISH_INTERVAL_MINUTES", "60")
+
+
+def scheduled(youtube):
+    update = youtube.videos.return_value.update
+    bodies = [kwargs["body"] for _, kwargs in update.call_args_list]
+    return {body["id"]: body["status"]["publishAt"] for body in bodies}
+
+
+def test_first_run_staggers_in_session_order(mocker, pairs, publish_env):
+    youtube = mocker.Mock()
+    statuses = {vid: {"privacyStatus": "unlisted"} for _, vid in pairs}
+
+    schedule_publishing(youtube, pairs, statuses)
+
+    assert scheduled(youtube) == {
+        "vid-A": "2022-10-01T00:00:00.000Z",
+        "vid-B": "2022-10-01T01:00:00.000Z",
+        "vid-C": "2022-10-01T02:00:00.000Z",
+    }
+
+
+def test_rerun_after_first_goes_public_changes_nothing(
+    mocker, pairs, publish_env
+):
+    youtube = mocker.Mock()
+    statuses = {
+        "vid-A": {"privacyStatus": "public"},
+        "vid-B": {
+            "privacyStatus": "private",
+            "publishAt": "2022-10-01T01:00:00Z",
+        },
+        "vid-C": {
+            "privacyStatus": "private",
+            # Same instant, spelled differently by YouTube.
+            "publishAt": "2022-10-01T10:00:00+08:00",
+        },
+    }
+
+    schedule_publishing(youtube, pairs, statuses)
+
+    assert scheduled(youtube) == {}
+
+
+def test_gone_video_keeps_later_slots(mocker, pairs, publish_env):
+    youtube = mocker.Mock()
+    statuses = {
+        "vid-B": {"privacyStatus": "unlisted"},
+        "vid-C": {"privacyStatus": "unlisted"},
+    }
+
+    schedule_publishing(youtube, pairs, statuses)
+
+    assert scheduled(youtube) == {
+        "vid-B": "2022-10-01T01:00:00.000Z",
+        "vid-C": "2022-10-01T02:00:00.000Z",
+    }
+
+
+def test_without_start_existing_schedules_are_kept(mocker, pairs, monkeypatch):
+    monkeypatch.delenv("PUBLISH_START", raising=False)
+    youtube = mocker.Mock()
+    statuses = {
+        vid: {"privacyStatus": "private", "publishAt": "2022-10-01T00:00:00Z"}
+        for _, vid in pairs
+    }
+
+    schedule_publishing(youtube, pairs, statuses)
+
+    assert scheduled(youtube) == {}
+
+
+def test_without_start_first_slot_is_in_the_future(mocker, pairs, monkeypatch):
+    monkeypatch.delenv("PUBLISH_START", raising=False)
+    monkeypatch.setenv("PUBLISH_INTERVAL_MINUTES", "60")
+    youtube = mocker.Mock()
+    statuses = {vid: {"privacyStatus": "unlisted"} for _, vid in pairs}
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    schedule_publishing(youtube, pairs, statuses)
+
+    first = parse_datetime(scheduled(youtube)["vid-A"])
+    assert first - now >= datetime.timedelta(minutes=59)
+
+
+def test_videos_that_failed_processing_are_not_published(pairs, tmp_path):
+    state = StateStore(tmp_path.joinpath("state.json"))
+    for (session, vid), status in zip(
+        pairs, ["succeeded", "terminated", "rejected"]
+    ):
+        state.update_video(vid, session_id=session.id, status=status)
+
+    published = _published_sessions([s for s, _ in pairs], state)
+
+    assert [vid for _, vid in published] == ["vid-A"]
+
+
+def playlist_after_inserts(mocker, pairs, playlist):
+    """Run insert_into_playlist on a playlist and return its new order."""
+    state = mocker.Mock()
+    state.list_playlist_items.return_value = [
+        {"snippet": {"position": i, "resourceId": {"videoId": vid}}}
+        for i, vid in enumerate(playlist)
+    ]
+    youtube = mocker.Mock()
+
+    insert_into_playlist(youtube, pairs, state)
+
+    playlist = list(playlist)
+    insert = youtube.playlistItems.return_value.insert
+    for _, kwargs in insert.call_args_list:
+        snippet = kwargs["body"]["snippet"]
+        playlist.insert(snippet["position"], snippet["resourceId"]["videoId"])
+    return playlist
+
+
+def test_playlist_keeps_other_videos_in_place(mocker, pairs):
+    assert playlist_after_inserts(mocker, pairs, ["intro", "vid-A"]) == [
+        "intro",
+        "vid-A",
+        "vid-B",
+        "vid-C",
+    ]
+    assert playlist_after_inserts(mocker, pairs, ["intro", "vid-B"]) == [
+        "intro",
+        "vid-A",
+        "vid-B",
+        "vid-C",
+    ]
+    assert playlist_after_inserts(mocker, pairs, ["intro"]) == [
+        "intro",
+        "vid-A",
+        "vid-B",
+        "vid-C",
+    ]
+
+
+def test_playlist_out_of_order_gets_missing_after_previous(mocker, pairs):
+    # Nothing is moved, but B still follows A.
+    assert playlist_after_inserts(mocker, pairs, ["vid-C", "x", "vid-A"]) == [
+        "vid-C",
+        "x",
+        "vid-A",
+        "vid-B",
+    ]
@@ -0,0 +1,51 @@
+import datetime
+import time
+
+from session_video_publisher.render import render_all
+
+from .conftest import session_data
+
+N_SESSIONS = 5000
+N_TRACKS = 4
+
+
+def synthetic_schedule(n_sessions: int, n_tracks: int):
+    start = datetime.datetime(2022, 9, 3, 1, tzinfo=datetime.timezone.utc)
+    sessions = []
+    for i in range(n_sessions):
+        slot = start + datetime.timedelta(minutes=30 * (i // n_tracks))
+        sessions.append(
+            session_data(
+                f"s{i}",
+                f"Talk {i}: <Python> in track {i % n_tracks}",
+                slot.isoformat(),
+                (slot + datetime.timedelta(minutes=30)).isoformat(),
+                room=f"r{i % n_tracks}",
+                # Speakers give several talks each, across tracks.
+                speakers=[f"sp{i % 500}", f"sp{(i * 7) % 500}"],
+            )
+        )
+    return sessions
+
+
+def test_render_all_matches_session_methods(make_sessions):
+    sessions = make_sessions(synthetic_schedule(40, N_TRACKS), 500)
+    rendered = render_all(sessions)
+    assert [r.session for r in rendered] == sessions
+    for r in rendered:
+        assert r.title == r.session.render_video_title()
+        assert r.description == r.session.render_video_description()
+        assert "&lt;Python&gt;" in r.title
+
+
+def test_render_all_benchmark(make_sessions):
+    sessions = make_sessions(synthetic_schedule(N_SESSIONS, N_TRACKS), 500)
+
+    started = time.perf_counter()
+    rendered = render_all(sessions)
+    elapsed = time.perf_counter() - started
+
+    assert len(rendered) == N_SESSIONS
+    print(f"rendered {N_SESSIONS} sessions in {elapsed * 1000:.0f} ms")
+    # About 70 ms here; only guard against pathological slowdowns.
+    assert elapsed < 2
@@ -0,0 +1,144 @@
+import datetime
+import json
+import multiprocessing
+import os
+
+from session_video_publisher import scan
+from session_video_publisher.scan import INDEX_FILE_NAME, VideoIndex
+
+_scandir = os.scandir
+
+N_WORKERS = 4
+N_SAVES = 200
+
+
+def _save_repeatedly(root, start):
+    index = VideoIndex(root)
+    index.scan()
+    start.wait()
+    for _ in range(N_SAVES):
+        index.save()
+
+
+def test_scan_hints_and_excludes(tmp_path):
+    for rel_path in [
+        "R1/day2/Async Python Internals.mp4",
+        "2022-09-03/R0/Keynote.AVI",
+        "R1/day2/notes.txt",
+        "done/R1/day1/Uploaded.mp4",
+        "quarantine/Broken.mp4",
+        "R2/.hidden.mp4",
+        "R2/skip-me.mp4",
+    ]:
+        path = tmp_path.joinpath(rel_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+
+    videos = VideoIndex(tmp_path, excludes=["skip-*"]).scan()
+
+    found = {
+        video.path.relative_to(tmp_path).as_posix(): video for video in videos
+    }
+    assert sorted(found) == [
+        "2022-09-03/R0/Keynote.AVI",
+        "R1/day2/Async Python Internals.mp4",
+    ]
+    keynote = found["2022-09-03/R0/Keynote.AVI"]
+    assert (keynote.room, keynote.day, keynote.date) == (
+        "R0",
+        None,
+        datetime.date(2022, 9, 3),
+    )
+    talk = found["R1/day2/Async Python Internals.mp4"]
+    assert (talk.room, talk.day, talk.date) == ("R1", 2, None)
+
+
+def test_probe_cache_survives_rescan(tmp_path):
+    tmp_path.joinpath("a.mp4").write_bytes(b"x")
+    index = VideoIndex(tmp_path)
+    (video,) = index.scan()
+    index.update_probe(video, {"format": {"duration": "1800"}})
+    index.save()
+
+    (video,) = VideoIndex(tmp_path).scan()
+    assert video.probe == {"format": {"duration": "1800"}}
+
+    tmp_path.joinpath("a.mp4").write_bytes(b"changed")
+    (video,) = VideoIndex(tmp_path).scan()
+    assert video.probe is None
+
+
+def test_concurrent_saves_from_several_processes(tmp_path):
+    # Sharded uploaders on a shared VIDEO_ROOT all save the same index.
+    tmp_path.joinpath("a.mp4").write_bytes(b"")
+    start = multiprocessing.Event()
+    workers = [
+        multiprocessing.Process(
+            target=_save_repeatedly, args=(tmp_path, start)
+        )
+        for _ in range(N_WORKERS)
+    ]
+    for worker in workers:
+        worker.start()
+    start.set()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    assert [p.name for p in tmp_path.iterdir() if p.name != "a.mp4"] == [
+        INDEX_FILE_NAME
+    ]
+    with open(tmp_path.joinpath(INDEX_FILE_NAME), encoding="utf-8") as f:
+        assert list(json.load(f)) == ["a.mp4"]
+
+
+def test_save_skips_unchanged_index(tmp_path):
+    tmp_path.joinpath("a.mp4").write_bytes(b"x")
+    index_path = tmp_path.joinpath(INDEX_FILE_NAME)
+    index = VideoIndex(tmp_path)
+    (video,) = index.scan()
+    index.save()
+    index_path.unlink()
+
+    # Nothing changed, so nothing is written.
+    index.scan()
+    index.save()
+    VideoIndex(tmp_path).save()
+    assert not index_path.exists()
+
+    index.update_probe(video, {"format": {"duration": "1800"}})
+    index.save()
+    assert index_path.exists()
+
+
+class _VanishingScandir:
+    """os.scandir that deletes one file right after listing it."""
+
+    def __init__(self, directory, victim):
+        with _scandir(directory) as it:
+            self._entries = list(it)
+        for entry in self._entries:
+            if entry.path == str(victim):
+                os.unlink(entry.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def __iter__(self):
+        return iter(self._entries)
+
+
+def test_scan_skips_files_that_vanish(tmp_path, monkeypatch):
+    tmp_path.joinpath("a.mp4").write_bytes(b"")
+    tmp_path.joinpath("b.mp4").write_bytes(b"")
+    victim = tmp_path.joinpath("a.mp4")
+    monkeypatch.setattr(
+        scan.os, "scandir", lambda path: _VanishingScandir(path, victim)
+    )
+
+    assert [video.path.name for video in VideoIndex(tmp_path).scan()] == [
+        "b.mp4"
+    ]
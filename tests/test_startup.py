@@ -0,0 +1,63 @@
+import pathlib
+import subprocess
+import sys
+import time
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+# Pulled in by the commands that need them, never just to parse arguments.
+HEAVY_MODULES = [
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "fuzzywuzzy",
+    "tqdm",
+    "requests",
+    "slugify",
+    "dateutil",
+]
+
+# Wall time for `-h`, interpreter startup included (about 90 ms here).
+STARTUP_BUDGET_SECONDS = 0.2
+
+
+def run_help():
+    started = time.perf_counter()
+    # An empty environment, as on a machine with no .env file loaded.
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-m",
+            "session_video_publisher",
+            "-h",
+        ],
+        cwd=REPO_ROOT,
+        env={},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - started
+    imported = {
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    }
+    return result, imported, elapsed
+
+
+def test_help_imports_nothing_heavy():
+    result, imported, _ = run_help()
+    assert "--upload" in result.stdout
+    assert "session_video_publisher" in imported
+    roots = {name.split(".")[0] for name in imported}
+    assert [name for name in HEAVY_MODULES if name in roots] == []
+
+
+def test_startup_time():
+    # Best of three, to keep a busy machine from failing the run.
+    elapsed = min(run_help()[2] for _ in range(3))
+    print(f"`-h` took {elapsed * 1000:.0f} ms")
+    assert elapsed < STARTUP_BUDGET_SECONDS
@@ -0,0 +1,111 @@
+import hashlib
+import json
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from session_video_publisher.state import StateStore, body_digest
+
+
+class FakePlaylist:
+    """Serves playlistItems.list pages, honouring If-None-Match."""
+
+    def __init__(self, n_items):
+        self.titles = [f"Talk {i}" for i in range(n_items)]
+        self.requests = []
+
+    def _item(self, i):
+        return {
+            "etag": f"item-{i}-{self.titles[i]}",
+            "snippet": {
+                "resourceId": {"videoId": f"v{i}"},
+                "title": self.titles[i],
+                "description": "",
+            },
+        }
+
+    def playlistItems(self):
+        return self
+
+    def list(self, part, playlistId, maxResults, pageToken=None):
+        start = int(pageToken or 0)
+        items = [
+            self._item(i)
+            for i in range(start, min(start + maxResults, len(self.titles)))
+        ]
+        response = {
+            "etag": hashlib.sha1(
+                json.dumps(items).encode("utf-8")
+            ).hexdigest(),
+            "items": items,
+        }
+        if start + maxResults < len(self.titles):
+            response["nextPageToken"] = str(start + maxResults)
+        return FakeRequest(self, response)
+
+
+class FakeRequest:
+    def __init__(self, playlist, response):
+        self.playlist = playlist
+        self.response = response
+        self.headers = {}
+
+    def execute(self):
+        not_modified = (
+            self.headers.get("If-None-Match") == self.response["etag"]
+        )
+        self.playlist.requests.append(not_modified)
+        if not_modified:
+            raise HttpError(httplib2.Response({"status": 304}), b"")
+        return self.response
+
+
+def titles(items):
+    return [item["snippet"]["title"] for item in items]
+
+
+def test_playlist_pages_are_each_revalidated(tmp_path):
+    youtube = FakePlaylist(60)
+    state = StateStore(tmp_path.joinpath("state.json"))
+    assert titles(state.list_playlist_items(youtube, "PL", 1000)) == (
+        youtube.titles
+    )
+    assert youtube.requests == [False, False]
+    state.save()
+
+    # Nothing changed: both pages come back 304.
+    state = StateStore(tmp_path.joinpath("state.json"))
+    assert titles(state.list_playlist_items(youtube, "PL", 1000)) == (
+        youtube.titles
+    )
+    assert youtube.requests[2:] == [True, True]
+
+    # An edit past item 50 still shows up.
+    youtube.titles[55] = "Renamed talk"
+    items = state.list_playlist_items(youtube, "PL", 1000)
+    assert titles(items)[55] == "Renamed talk"
+    assert youtube.requests[4:] == [True, False]
+    assert state.get_video("v55")["title"] == "Renamed talk"
+
+
+def test_playlist_max_results(tmp_path):
+    youtube = FakePlaylist(60)
+    state = StateStore(tmp_path.joinpath("state.json"))
+    assert len(state.list_playlist_items(youtube, "PL", 20)) == 20
+    assert len(state.list_playlist_items(youtube, "PL", 55)) == 55
+
+
+def test_old_cache_format_is_ignored(tmp_path):
+    path = tmp_path.joinpath("state.json")
+    path.write_text(
+        json.dumps({"playlists": {"PL": {"etag": "x", "items": []}}})
+    )
+    youtube = FakePlaylist(3)
+    state = StateStore(path)
+    assert len(state.list_playlist_items(youtube, "PL", 1000)) == 3
+
+
+def test_body_digest_ignores_key_order():
+    assert body_digest({"a": 1, "b": "資料"}) == body_digest(
+        {"b": "資料", "a": 1}
+    )
@@ -0,0 +1,123 @@
+import dataclasses
+import datetime
+
+import dateutil.parser
+import pytest
+import pytz
+
+from session_video_publisher import timeutil
+from session_video_publisher.common import format_datetime_for_google
+from session_video_publisher.info import Conference, Session
+from session_video_publisher.timeutil import get_timezone, parse_datetime
+
+TIMESTAMPS = [
+    "2022-09-03T01:30:00Z",
+    "2022-09-03T09:30:00+08:00",
+    "2022-09-03T09:30:00.123456+08:00",
+    "2022-09-03T01:30:00.5Z",
+    "2022-09-04T23:59:59.999+08:00",
+    "2022-09-03T09:30:00-05:30",
+    # Not ISO 8601 strictly speaking, left to the dateutil fallback.
+    "2022-09-03 09:30:00 +0800",
+    "Sat, 03 Sep 2022 01:30:00 +0000",
+]
+
+
+# The implementations before the fast path, kept to compare against.
+
+
+def _old_format_datetime_for_google(dt: datetime.datetime) -> str:
+    return dt.astimezone(pytz.utc).strftime(r"%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _old_render_slot(session: Session) -> str:
+    d_secs = (session.start.date() - session.conference.day1).total_seconds()
+    if d_secs > 47 * 60 * 60:
+        day = 3
+    elif d_secs > 23 * 60 * 60:
+        day = 2
+    else:
+        day = 1
+    start = str(session.start.astimezone(session.conference.timezone).time())[
+        :5
+    ]
+    end = str(session.end.astimezone(session.conference.timezone).time())[:5]
+    if session.room not in ("R0", "R1", "R2", "R3"):
+        return f"Day {day}, {start}–{end}"
+    return f"Day {day}, {session.room} {start}–{end}"
+
+
+@pytest.mark.parametrize("s", TIMESTAMPS)
+def test_parse_datetime_matches_dateutil(s):
+    parsed = parse_datetime(s)
+    expected = dateutil.parser.parse(s)
+    assert parsed == expected
+    assert parsed.utcoffset() == expected.utcoffset()
+
+
+@pytest.mark.parametrize("s", TIMESTAMPS)
+def test_format_datetime_for_google_matches_pytz(s):
+    dt = dateutil.parser.parse(s)
+    assert format_datetime_for_google(dt) == _old_format_datetime_for_google(
+        dt
+    )
+
+
+# pytz zones can't be passed as tzinfo=, so this needs Python 3.9+.
+@pytest.mark.skipif(timeutil.zoneinfo is None, reason="needs zoneinfo")
+def test_format_datetime_for_google_zoneinfo_input():
+    dt = datetime.datetime(
+        2022, 9, 3, 9, 30, 0, 123456, tzinfo=get_timezone("Asia/Taipei")
+    )
+    assert format_datetime_for_google(dt) == "2022-09-03T01:30:00.123Z"
+    assert format_datetime_for_google(dt) == _old_format_datetime_for_google(
+        dt
+    )
+
+
+def test_get_timezone_is_cached_and_agrees_with_pytz():
+    tz = get_timezone("Asia/Taipei")
+    assert get_timezone("Asia/Taipei") is tz
+    dt = datetime.datetime(2022, 9, 3, 1, 30, tzinfo=datetime.timezone.utc)
+    assert (
+        dt.astimezone(tz).utcoffset()
+        == dt.astimezone(pytz.timezone("Asia/Taipei")).utcoffset()
+    )
+
+
+@pytest.mark.parametrize("room", ["R0", "R3", "Main Hall"])
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        ("2022-09-03T01:30:00Z", "2022-09-03T02:00:00Z"),
+        ("2022-09-04T09:30:00.5+08:00", "2022-09-04T10:15:00+08:00"),
+        # Crosses midnight local time, on day three.
+        ("2022-09-05T15:45:00Z", "2022-09-05T16:30:00.999Z"),
+    ],
+)
+def test_render_slot_matches_pytz(room, start, end):
+    session = Session(
+        conference=Conference(
+            "PyCon Taiwan 2022",
+            datetime.date(2022, 9, 3),
+            get_timezone("Asia/Taipei"),
+        ),
+        id="s1",
+        title="Talk",
+        description="",
+        start=parse_datetime(start),
+        end=parse_datetime(end),
+        slides=None,
+        speakers=[],
+        room=room,
+        lang="en",
+    )
+    old_session = dataclasses.replace(
+        session,
+        conference=dataclasses.replace(
+            session.conference, timezone=pytz.timezone("Asia/Taipei")
+        ),
+        start=dateutil.parser.parse(start),
+        end=dateutil.parser.parse(end),
+    )
+    assert session._render_slot() == _old_render_slot(old_session)
@@ -0,0 +1,61 @@
+from session_video_publisher import update_video as update_module
+from session_video_publisher.info import ConferenceInfoSource
+from session_video_publisher.state import StateStore
+
+from .conftest import make_source_data, session_data
+
+
+def test_update_leaves_status_alone(mocker, monkeypatch, tmp_path, conference):
+    for name, value in {
+        "YEAR": "2022",
+        "MONTH": "9",
+        "DAY": "3",
+        "OAUTH2_CLIENT_SECRET": "secret.json",
+        "URL": "https://example.com/api",
+        "PLAYLIST_ID": "PL1",
+        "YOUTUBE_API_KEY": "key",
+        "STATE_PATH": str(tmp_path.joinpath("state.json")),
+    }.items():
+        monkeypatch.setenv(name, value)
+
+    source = ConferenceInfoSource(
+        make_source_data(
+            [
+                session_data(
+                    "s1",
+                    "Talk",
+                    "2022-09-03T02:00:00Z",
+                    "2022-09-03T02:30:00Z",
+                )
+            ]
+        ),
+        conference,
+    )
+    state = StateStore(tmp_path.joinpath("state.json"))
+    state.update_video("vid1", session_id="s1", body_digest="outdated")
+    state.save()
+
+    mocker.patch.object(update_module, "InstalledAppFlow")
+    youtube = mocker.patch.object(update_module, "build").return_value
+    youtube.playlists().list().execute.return_value = {
+        "items": [{"id": "PL1", "contentDetails": {"itemCount": 0}}]
+    }
+    youtube.playlistItems().list().execute.return_value = {
+        "etag": "e",
+        "items": [],
+    }
+    youtube.videos().update().execute.return_value = {
+        "etag": "e",
+        "snippet": {"title": "Talk", "description": ""},
+    }
+    mocker.patch.object(
+        update_module, "load_conference_source", return_value=source
+    )
+
+    update_module.update_video()
+
+    update = youtube.videos().update
+    _, kwargs = update.call_args
+    assert kwargs["part"] == "snippet,recordingDetails"
+    assert "status" not in kwargs["body"]
+    assert kwargs["body"]["id"] == "vid1"
@@ -0,0 +1,48 @@
+from session_video_publisher.info import ConferenceInfoSource
+from session_video_publisher.state import StateStore
+from session_video_publisher.upload_video import iter_plan_matches
+
+from .conftest import make_source_data, session_data
+
+
+def test_iter_plan_matches_skips_finished_work(tmp_path, conference):
+    source = ConferenceInfoSource(
+        make_source_data(
+            [
+                session_data(
+                    f"s{i}",
+                    f"Talk {i}",
+                    "2022-09-03T01:00:00Z",
+                    "2022-09-03T01:30:00Z",
+                )
+                for i in range(4)
+            ]
+        ),
+        conference,
+    )
+    video_root = tmp_path.joinpath("videos")
+    video_root.mkdir()
+    for i in (0, 1, 2):
+        video_root.joinpath(f"Talk {i}.mp4").write_bytes(b"")
+    plan = {
+        "uploads": [
+            {
+                "session_id": f"s{i}",
+                "title": f"Talk {i}",
+                "path": f"Talk {i}.mp4",
+            }
+            for i in range(4)
+        ]
+        + [{"session_id": "gone", "title": "Gone", "path": "Gone.mp4"}]
+    }
+
+    state = StateStore(tmp_path.joinpath("state.json"))
+    # s0 was uploaded by an earlier run; s3's file was moved into done/.
+    state.update_video("vid0", session_id="s0")
+
+    matches = list(iter_plan_matches(source, video_root, plan, state))
+
+    assert [(session.id, path.name) for session, path in matches] == [
+        ("s1", "Talk 1.mp4"),
+        ("s2", "Talk 2.mp4"),
+    ]
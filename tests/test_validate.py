@@ -0,0 +1,161 @@
+import json
+import stat
+import sys
+
+import pytest
+
+from session_video_publisher import probe as probe_module
+from session_video_publisher.probe import require_ffprobe
+from session_video_publisher.scan import VideoIndex
+from session_video_publisher.upload_video import validate_or_quarantine
+from session_video_publisher.validate import check_media
+
+from .conftest import session_data
+
+# Stands in for ffprobe: the "video" files hold the JSON ffprobe would print,
+# or an error message for files ffprobe can't read.
+STUB_FFPROBE = """\
+import sys
+
+with open(sys.argv[-1], encoding="utf-8") as f:
+    content = f.read()
+if content.startswith("ERROR "):
+    sys.stderr.write(content[len("ERROR ") :])
+    sys.exit(1)
+sys.stdout.write(content)
+"""
+
+
+def ffprobe_output(
+    width=1920,
+    height=1080,
+    dar="16:9",
+    duration="1800.0",
+    codec="h264",
+    audio=True,
+):
+    streams = [
+        {
+            "codec_type": "video",
+            "codec_name": codec,
+            "width": width,
+            "height": height,
+            "display_aspect_ratio": dar,
+        }
+    ]
+    if audio:
+        streams.append({"codec_type": "audio", "codec_name": "aac"})
+    fmt = {"format_name": "mov,mp4,m4a,3gp,3g2,mj2"}
+    if duration is not None:
+        fmt["duration"] = duration
+    return json.dumps({"format": fmt, "streams": streams})
+
+
+FILES = {
+    "good.mp4": ffprobe_output(),
+    # 720x480 after dvd540fix: still 720x480 pixels, displayed at 4:3.
+    "dvd-fixed.avi": ffprobe_output(720, 480, "4:3"),
+    "dvd-unfixed.avi": ffprobe_output(720, 480, "3:2"),
+    "truncated.mp4": "ERROR truncated.mp4: moov atom not found\n",
+    "no-duration.mp4": ffprobe_output(duration=None),
+    "too-short.mp4": ffprobe_output(duration="120.0"),
+    "silent.mp4": ffprobe_output(audio=False),
+}
+
+
+@pytest.fixture()
+def stub_ffprobe(tmp_path, monkeypatch):
+    path = tmp_path.joinpath("ffprobe")
+    path.write_text(f"#!{sys.executable}\n{STUB_FFPROBE}")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(probe_module, "FFPROBE", str(path))
+    return path
+
+
+@pytest.fixture()
+def video_root(tmp_path):
+    root = tmp_path.joinpath("videos")
+    for name, content in FILES.items():
+        path = root.joinpath("R1", "day1", name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+    return root
+
+
+@pytest.fixture()
+def session(make_sessions):
+    (session,) = make_sessions(
+        [
+            session_data(
+                "s1", "Talk", "2022-09-03T02:00:00Z", "2022-09-03T02:30:00Z"
+            )
+        ]
+    )
+    return session
+
+
+def test_stub_ffprobe_results(stub_ffprobe, video_root, session):
+    index = VideoIndex(video_root)
+    videos = index.scan()
+    index.probe_many(videos)
+
+    problems = {
+        video.path.name: check_media(video.probe, session) for video in videos
+    }
+    assert problems["good.mp4"] == []
+    assert problems["dvd-fixed.avi"] == []
+    assert problems["dvd-unfixed.avi"] == [
+        "720x480 without 4:3 aspect, run dvd540fix"
+    ]
+    assert problems["truncated.mp4"] == [
+        "ffprobe failed: truncated.mp4: moov atom not found"
+    ]
+    assert problems["no-duration.mp4"] == [
+        "no duration, file is probably truncated"
+    ]
+    assert problems["too-short.mp4"] == [
+        "only 2 minutes long, session slot is 30 minutes"
+    ]
+    assert problems["silent.mp4"] == ["no audio stream"]
+
+
+def test_probe_results_are_cached(stub_ffprobe, video_root, session):
+    index = VideoIndex(video_root)
+    index.probe_many(index.scan())
+    index.save()
+
+    # With ffprobe gone, a rescan still has every result.
+    stub_ffprobe.unlink()
+    videos = VideoIndex(video_root).scan()
+    assert all(video.probe is not None for video in videos)
+
+
+def test_invalid_files_are_quarantined(stub_ffprobe, video_root, session):
+    index = VideoIndex(video_root)
+    videos = {video.path.name: video for video in index.scan()}
+    index.probe_many(videos.values())
+
+    assert validate_or_quarantine(session, video_root, videos["good.mp4"])
+    assert video_root.joinpath("R1/day1/good.mp4").exists()
+
+    for name in ("truncated.mp4", "dvd-unfixed.avi"):
+        assert not validate_or_quarantine(session, video_root, videos[name])
+        assert not video_root.joinpath("R1/day1", name).exists()
+        assert video_root.joinpath("quarantine/R1/day1", name).exists()
+
+    # Quarantined files are left out of the next scan.
+    names = {video.path.name for video in VideoIndex(video_root).scan()}
+    assert "truncated.mp4" not in names
+    assert "dvd-unfixed.avi" not in names
+
+
+def test_missing_ffprobe_stops_the_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        probe_module, "FFPROBE", str(tmp_path.joinpath("no-ffprobe"))
+    )
+    with pytest.raises(SystemExit, match="ffprobe not found"):
+        require_ffprobe()
+
+
+def test_unprobed_file_does_not_pass(session):
+    assert check_media(None, session) == ["not probed"]